@@ -5,7 +5,28 @@ from PyQt5.QtGui import *
 from PyQt5.QtWidgets import *
 
 
+RESULTS = {
+    1: ("winIcon.png", "You have won"),
+    2: ("loseIcon.png", "You have lost"),
+    3: ("drawIcon.png", "It's a draw"),
+}
+
+
+def pixmap(name):
+    """Loads an icon through QPixmapCache, so each is decoded only once."""
+    path = os.path.join("Icons", name)
+    cached = QPixmapCache.find(path)
+    if cached is None or cached.isNull():
+        cached = QPixmap(path)
+        QPixmapCache.insert(path, cached)
+    return cached
+
+
 class Dialog(QDialog):
+    """
+    Shows the result of a game. Create one per window and call
+    show_result() at the end of every game.
+    """
 
     def __init__(self, parent=None, state=None):
         super(Dialog, self).__init__(parent)
@@ -13,37 +34,29 @@ class Dialog(QDialog):
 
         layout = QGridLayout(self)
 
-        pixmapLabel = QLabel("")
-        label = QLabel("")
+        self.pixmapLabel = QLabel("")
+        self.label = QLabel("")
         okButton = QPushButton("Ok")
 
-        winPixmap = QPixmap(os.path.join("Icons", "winIcon.png"))
-        losePixmap = QPixmap(os.path.join("Icons", "loseIcon.png"))
-        drawPixmap = QPixmap(os.path.join("Icons", "drawIcon.png"))
-
-        if state == 1:
-            pixmapLabel.setPixmap(winPixmap)
-            label.setText("You have won")
-            layout.addWidget(pixmapLabel, 0, 0)
-            layout.addWidget(label, 0, 1)
-            layout.addWidget(okButton, 1, 1)
-
-        elif state == 2:
-            pixmapLabel.setPixmap(losePixmap)
-            label.setText("You have lost")
-            layout.addWidget(pixmapLabel, 0, 0)
-            layout.addWidget(label, 0, 1)
-            layout.addWidget(okButton, 1, 1)
-
-        else:
-            pixmapLabel.setPixmap(drawPixmap)
-            label.setText("It's a draw")
-            layout.addWidget(pixmapLabel, 0, 0)
-            layout.addWidget(label, 0, 1)
-            layout.addWidget(okButton, 1, 1)
+        layout.addWidget(self.pixmapLabel, 0, 0)
+        layout.addWidget(self.label, 0, 1)
+        layout.addWidget(okButton, 1, 1)
 
         okButton.clicked.connect(self.hide)
 
+        if state is not None:
+            self.set_state(state)
+
+    def set_state(self, state):
+        """Shows the icon and text for state (1 won, 2 lost, else draw)."""
+        iconName, text = RESULTS.get(state, RESULTS[3])
+        self.pixmapLabel.setPixmap(pixmap(iconName))
+        self.label.setText(text)
+
+    def show_result(self, state):
+        self.set_state(state)
+        self.show()
+
 
 if __name__ == "__main__":
     app = QApplication([])
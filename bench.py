@@ -0,0 +1,225 @@
+"""
+Reproducible benchmarks for the engine and the game window.
+
+    python bench.py [--quick] [--output results.json]
+
+Covers nextMove on the empty board and on a fixed set of mid-game
+positions, isWin and check_win throughput, a full game played through
+button_clicked/com_play on an offscreen Qt platform, and cold-start
+time. Results are written as JSON so runs from different builds can be
+compared; timings are in seconds.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+import engine
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def measure(func, number, repeat):
+    """
+    Calls func number times per round for repeat rounds.
+
+    Return Value:
+        dict with the best and median seconds per call and calls per
+        second at the best round
+    """
+    rounds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        rounds.append((time.perf_counter() - start) / number)
+    best = min(rounds)
+    return {
+        'best': best,
+        'median': statistics.median(rounds),
+        'per_second': 1 / best if best else None,
+        'calls': number * repeat,
+    }
+
+
+def midgame_positions(count=50, seed=1):
+    """A fixed set of unfinished 3x3 positions with 2 to 5 stones."""
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        board = list('---------')
+        player = 'X'
+        for _ in range(rng.randint(2, 5)):
+            empty = [i for i, c in enumerate(board) if c == '-']
+            board[rng.choice(empty)] = player
+            player = '0' if player == 'X' else 'X'
+        if engine.check_win(board, '0' if player == 'X' else 'X') == 2:
+            positions.append((board, player))
+    return positions
+
+
+def bench_next_move(quick):
+    results = {}
+    positions = midgame_positions()
+    repeat = 3 if quick else 5
+    configs = (
+        ('table', dict()),
+        ('alphabeta', dict(solutions=None, moveTime=None)),
+        ('minimax', dict(mode='minimax', solutions=None, moveTime=None)),
+    )
+    for name, kwargs in configs:
+        # a fresh engine per call measures a cold search; the shared
+        # one measures repeated queries served from its tables. The empty
+        # board is answered by the opening move; the reply to a corner
+        # opening is the first real search
+        results[name + '_empty_cold'] = measure(
+            lambda: engine.Engine(**kwargs).nextMove(list('---------'), 'X'),
+            1 if quick else 3, repeat)
+        results[name + '_reply_cold'] = measure(
+            lambda: engine.Engine(**kwargs).nextMove(list('X--------'), '0'),
+            1 if quick else 3, repeat)
+        warm = engine.Engine(**kwargs)
+
+        def midgame():
+            for board, player in positions:
+                warm.nextMove(board, player)
+        results[name + '_midgame_warm'] = measure(midgame, 1, repeat)
+        results[name + '_midgame_warm']['positions'] = len(positions)
+    return results
+
+
+def bench_win_checks(quick):
+    boards = [board for board, _ in midgame_positions(200)]
+    boards.append(list('XXX00----'))
+    number = 20 if quick else 200
+
+    def is_win():
+        for board in boards:
+            engine.isWin(board)
+
+    def check_win():
+        for board in boards:
+            engine.check_win(board, 'X')
+
+    results = {
+        'isWin': measure(is_win, number, 3),
+        'check_win': measure(check_win, number, 3),
+    }
+    for result in results.values():
+        result['per_second'] *= len(boards)
+        result['boards'] = len(boards)
+    return results
+
+
+def bench_gui_game(quick):
+    """Plays full games against the window on an offscreen platform."""
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    try:
+        from PyQt5.QtCore import Qt
+        from PyQt5.QtTest import QTest
+        from PyQt5.QtWidgets import QApplication
+        import main
+    except ImportError as error:
+        return {'skipped': str(error)}
+
+    app = QApplication.instance() or QApplication([])
+    game = main.Game()
+    game.show()
+    app.processEvents()
+
+    def wait_for(condition, timeout=10):
+        end = time.perf_counter() + timeout
+        while not condition() and time.perf_counter() < end:
+            app.processEvents()
+
+    board = game.boardWidget
+
+    def over():
+        return engine.check_win(game.model.cells, 'X') != 2
+
+    def play():
+        game.new_game()
+        while not over():
+            cell = game.model.empty_cells()[0]
+            replies = game.model.cells.count('0')
+            QTest.mouseClick(board, Qt.LeftButton,
+                             pos=board.cell_rect(cell).center())
+            wait_for(lambda: game.model.cells.count('0') > replies or
+                     over())
+
+    result = measure(play, 2 if quick else 10, 3)
+    game.cancel_search()
+    game.close()
+    return result
+
+
+def bench_cold_start(quick):
+    """Wall time of fresh interpreters importing the engine and GUI."""
+    results = {}
+    env = dict(os.environ, QT_QPA_PLATFORM='offscreen')
+    commands = (
+        ('python', 'pass'),
+        ('import_engine', 'import engine'),
+        ('engine_first_move',
+         "import engine; engine.Engine().nextMove(list('X--------'), '0')"),
+        ('import_main', 'import main'),
+    )
+    for name, code in commands:
+        times = []
+        for _ in range(3 if quick else 10):
+            start = time.perf_counter()
+            done = subprocess.run([sys.executable, '-c', code], cwd=HERE,
+                                  env=env, stdout=subprocess.DEVNULL,
+                                  stderr=subprocess.DEVNULL)
+            times.append(time.perf_counter() - start)
+            if done.returncode != 0:
+                break
+        if done.returncode != 0:
+            results[name] = {'skipped': 'exit status {}'.format(
+                done.returncode)}
+        else:
+            results[name] = {'best': min(times),
+                             'median': statistics.median(times)}
+    return results
+
+
+BENCHMARKS = (
+    ('next_move', bench_next_move),
+    ('win_checks', bench_win_checks),
+    ('gui_game', bench_gui_game),
+    ('cold_start', bench_cold_start),
+)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--quick", action="store_true",
+                        help="fewer rounds, for a smoke test")
+    parser.add_argument("--output", type=argparse.FileType('w'),
+                        default=sys.stdout)
+    parser.add_argument("--only", choices=[name for name, _ in BENCHMARKS],
+                        action="append", help="run only these benchmarks")
+    args = parser.parse_args(argv)
+
+    os.chdir(HERE)  # the game loads its icons, sounds and table from here
+    results = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'benchmarks': {},
+    }
+    for name, bench in BENCHMARKS:
+        if args.only and name not in args.only:
+            continue
+        results['benchmarks'][name] = bench(args.quick)
+    json.dump(results, args.output, indent=2, sort_keys=True)
+    args.output.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""
+Bitboard representation of an N x N, k in a row position.
+
+Each side is stored as a single int whose bit i is set when that side
+owns cell i (cells are numbered row by row, from 0). Everything that
+depends only on the board size and win length (win-line masks, move
+order, symmetries) is precomputed once per (size, k) in a Geometry, so
+checking a win is a few AND/compare operations.
+"""
+
+import functools
+
+# symmetry transforms map masks through tables of this many bits at a
+# time; a 3x3 board is a single chunk
+CHUNK = 9
+
+
+def _lines(size, k):
+    """All runs of k cells in a row, column or diagonal."""
+    lines = []
+    for row in range(size):
+        for col in range(size):
+            for dr, dc in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                endRow, endCol = row + dr * (k - 1), col + dc * (k - 1)
+                if 0 <= endRow < size and 0 <= endCol < size:
+                    lines.append(tuple(
+                        (row + dr * j) * size + col + dc * j
+                        for j in range(k)
+                    ))
+    return lines
+
+
+def _symmetries(size):
+    """The 8 rotations and reflections of the board as cell maps."""
+    maps = []
+    for flip in (False, True):
+        for turns in range(4):
+            cells = []
+            for i in range(size * size):
+                row, col = divmod(i, size)
+                if flip:
+                    col = size - 1 - col
+                for _ in range(turns):
+                    row, col = col, size - 1 - row
+                cells.append(row * size + col)
+            maps.append(tuple(cells))
+    return tuple(maps)
+
+
+class Geometry(object):
+    """
+    Precomputed tables for one board size and win length. Use
+    geometry() rather than creating these directly, so each (size, k)
+    is built only once.
+    """
+
+    def __init__(self, size=3, k=3):
+        if size < 1 or not 1 <= k <= size:
+            raise ValueError("need 1 <= k <= size")
+        self.size = size
+        self.k = k
+        self.cells = size * size
+        self.full = (1 << self.cells) - 1
+
+        lines = _lines(size, k)
+        self.lines = tuple(sum(1 << cell for cell in line)
+                           for line in lines)
+        # cellLines[i] holds the indices of the lines through cell i
+        self.cellLines = tuple(
+            tuple(n for n, line in enumerate(lines) if i in line)
+            for i in range(self.cells)
+        )
+        # cellMasks[i] holds the masks of the same lines
+        self.cellMasks = tuple(
+            tuple(self.lines[n] for n in through)
+            for through in self.cellLines
+        )
+
+        # cells on more lines first (for 3x3: centre, corners, edges),
+        # then those nearer the centre
+        through = [0] * self.cells
+        for line in lines:
+            for cell in line:
+                through[cell] += 1
+        middle = (size - 1) / 2
+
+        def rank(i):
+            row, col = divmod(i, size)
+            return -through[i], abs(row - middle) + abs(col - middle), i
+        self.order = tuple(sorted(range(self.cells), key=rank))
+
+        # symmetries[t][i] is the cell that cell i is moved to by
+        # transform t
+        self.symmetries = _symmetries(size)
+        self.inverses = tuple(
+            tuple(cells.index(i) for i in range(self.cells))
+            for cells in self.symmetries
+        )
+        self._maskMaps = tuple(
+            tuple(
+                self._chunk_map(cells, start)
+                for start in range(0, self.cells, CHUNK)
+            )
+            for cells in self.symmetries
+        )
+
+    def __repr__(self):
+        return "Geometry(size={}, k={})".format(self.size, self.k)
+
+    def _chunk_map(self, cells, start):
+        """Images of every mask of the CHUNK cells from start on."""
+        width = min(CHUNK, self.cells - start)
+        return tuple(
+            sum(1 << cells[start + j] for j in range(width) if bits >> j & 1)
+            for bits in range(1 << width)
+        )
+
+    def has_line(self, mask):
+        """Returns True if the cells in mask complete any winning line."""
+        for line in self.lines:
+            if mask & line == line:
+                return True
+        return False
+
+    def has_line_through(self, mask, cell):
+        """
+        Returns True if the cells in mask complete a winning line through
+        cell; enough to test for a win right after a move on cell.
+        """
+        for line in self.cellMasks[cell]:
+            if mask & line == line:
+                return True
+        return False
+
+    def is_dead(self, x, o):
+        """Returns True if every line holds stones of both sides."""
+        for line in self.lines:
+            if not (line & x and line & o):
+                return False
+        return True
+
+    def transform(self, mask, t):
+        """Returns mask moved by symmetry transform t."""
+        result = 0
+        for table in self._maskMaps[t]:
+            result |= table[mask & ((1 << CHUNK) - 1)]
+            mask >>= CHUNK
+        return result
+
+    def canonical(self, x, o):
+        """
+        Maps a position to the smallest of its 8 symmetric images.
+
+        Return Value:
+            (x, o, t) where x and o are the canonical bitboards and t is
+            the transform used, for to_canonical_move() and
+            from_canonical_move()
+        """
+        bestX, bestO, best = x, o, 0
+        for t in range(1, 8):
+            cx = self.transform(x, t)
+            if cx > bestX:
+                continue
+            co = self.transform(o, t)
+            if cx < bestX or co < bestO:
+                bestX, bestO, best = cx, co, t
+        return bestX, bestO, best
+
+    def to_canonical_move(self, move, t):
+        return self.symmetries[t][move] if move >= 0 else move
+
+    def from_canonical_move(self, move, t):
+        return self.inverses[t][move] if move >= 0 else move
+
+
+def geometry(size=3, k=None):
+    """
+    Returns the shared Geometry for a size x size board, k in a row; k
+    defaults to the board size.
+    """
+    return _geometry(size, size if k is None else k)
+
+
+@functools.lru_cache(maxsize=None)
+def _geometry(size, k):
+    return Geometry(size, k)
+
+
+STANDARD = geometry(3, 3)
+
+# the 3x3 tables, for code that only plays the standard game
+WIN_MASKS = STANDARD.lines
+FULL = STANDARD.full
+has_line = STANDARD.has_line
+canonical = STANDARD.canonical
+to_canonical_move = STANDARD.to_canonical_move
+from_canonical_move = STANDARD.from_canonical_move
+
+
+class Position(object):
+    """A board stored as one bit mask per side."""
+
+    __slots__ = ('x', 'o', 'geometry')
+
+    def __init__(self, x=0, o=0, geometry=STANDARD):
+        self.x = x
+        self.o = o
+        self.geometry = geometry
+
+    @classmethod
+    def from_board(cls, board, k=None):
+        """
+        Builds a position from a list containing X, 0 and -. The board
+        size is taken from the length of the list; k defaults to the
+        board size.
+        """
+        size = int(round(len(board) ** 0.5))
+        if size * size != len(board):
+            raise ValueError("board is not square")
+        x = o = 0
+        for i, cell in enumerate(board):
+            if cell == 'X':
+                x |= 1 << i
+            elif cell != '-':
+                o |= 1 << i
+        return cls(x, o, geometry(size, k))
+
+    def to_board(self):
+        board = ['-'] * self.geometry.cells
+        for i in range(self.geometry.cells):
+            if self.x >> i & 1:
+                board[i] = 'X'
+            elif self.o >> i & 1:
+                board[i] = '0'
+        return board
+
+    def is_win(self):
+        return (self.geometry.has_line(self.x) or
+                self.geometry.has_line(self.o))
+
+    def is_full(self):
+        return self.x | self.o == self.geometry.full
+
+    def is_dead(self):
+        """True if neither side can complete a line any more."""
+        return self.geometry.is_dead(self.x, self.o)
+
+    def empty_cells(self):
+        occupied = self.x | self.o
+        return [i for i in range(self.geometry.cells)
+                if not occupied >> i & 1]
@@ -0,0 +1,156 @@
+"""
+The game board as a model and one custom-painted widget.
+
+BoardModel holds the cells of a size x size board ('X', '0' or '-', in
+the same list form the engine takes) and signals each cell that
+changes. BoardWidget paints the model and reports clicks by cell index.
+When a cell changes, only that cell's rectangle is repainted, and a
+paint event draws only the cells inside the region it was given, so the
+cost of a move does not grow with the board size.
+"""
+
+from PyQt5.QtCore import *
+from PyQt5.QtGui import *
+from PyQt5.QtWidgets import *
+
+
+class BoardModel(QObject):
+
+    cellChanged = pyqtSignal(int)
+    modelReset = pyqtSignal()
+
+    def __init__(self, size=3, parent=None):
+        super().__init__(parent)
+        self.size = size
+        self.cells = ['-'] * (size * size)
+
+    def reset(self, size=None):
+        """Empties the board, resizing it to size if given."""
+        if size is not None:
+            self.size = size
+        self.cells = ['-'] * (self.size * self.size)
+        self.modelReset.emit()
+
+    def cell(self, index):
+        return self.cells[index]
+
+    def set_cell(self, index, player):
+        if self.cells[index] != player:
+            self.cells[index] = player
+            self.cellChanged.emit(index)
+
+    def empty_cells(self):
+        return [i for i, cell in enumerate(self.cells) if cell == '-']
+
+
+class BoardWidget(QWidget):
+    """
+    Draws a BoardModel as a grid of square cells and emits clicked with
+    the index of an empty cell when it is clicked. Clicks are ignored
+    while interactive is False; unlike disabling the widget, that does
+    not repaint it.
+    """
+
+    clicked = pyqtSignal(int)
+
+    # gap between cells, in pixels
+    SPACING = 4
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.model = None
+        self.icons = {}
+        self.interactive = True
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+
+    def set_model(self, model):
+        if self.model is not None:
+            self.model.cellChanged.disconnect(self.update_cell)
+            self.model.modelReset.disconnect(self.update)
+        self.model = model
+        model.cellChanged.connect(self.update_cell)
+        model.modelReset.connect(self.update)
+        self.update()
+
+    def set_icons(self, xIcon, oIcon):
+        """Sets the QIcons drawn for the stones of X and 0."""
+        self.icons = {'X': xIcon, '0': oIcon}
+        self.update()
+
+    def sizeHint(self):
+        return QSize(400, 400)
+
+    def cell_size(self):
+        """Side of a cell (including its share of the spacing)."""
+        if self.model is None:
+            return 0
+        return max(1, min(self.width(), self.height()) // self.model.size)
+
+    def origin(self):
+        """Top left corner of the board, which is centred in the widget."""
+        side = self.cell_size() * self.model.size
+        return QPoint((self.width() - side) // 2,
+                      (self.height() - side) // 2)
+
+    def cell_rect(self, index):
+        row, col = divmod(index, self.model.size)
+        side = self.cell_size()
+        corner = self.origin()
+        return QRect(corner.x() + col * side, corner.y() + row * side,
+                     side, side)
+
+    def cell_at(self, pos):
+        """Index of the cell under pos, or -1 outside the board."""
+        if self.model is None:
+            return -1
+        side = self.cell_size()
+        corner = self.origin()
+        col = (pos.x() - corner.x()) // side
+        row = (pos.y() - corner.y()) // side
+        if 0 <= row < self.model.size and 0 <= col < self.model.size:
+            return row * self.model.size + col
+        return -1
+
+    def update_cell(self, index):
+        self.update(self.cell_rect(index))
+
+    def cells_in(self, rect):
+        """Indices of the cells that meet rect."""
+        size = self.model.size
+        side = self.cell_size()
+        rect = rect.translated(-self.origin())
+        firstRow = max(0, rect.top() // side)
+        lastRow = min(size - 1, rect.bottom() // side)
+        firstCol = max(0, rect.left() // side)
+        lastCol = min(size - 1, rect.right() // side)
+        return [row * size + col
+                for row in range(firstRow, lastRow + 1)
+                for col in range(firstCol, lastCol + 1)]
+
+    def paintEvent(self, event):
+        if self.model is None:
+            return
+        # only the cells in the region to repaint, which after a move
+        # is just the cells that changed
+        dirty = set()
+        for rect in event.region().rects():
+            dirty.update(self.cells_in(rect))
+
+        painter = QPainter(self)
+        palette = self.palette()
+        gap = min(self.SPACING, self.cell_size() // 8)
+        for index in sorted(dirty):
+            rect = self.cell_rect(index).adjusted(gap, gap, -gap, -gap)
+            painter.fillRect(rect, palette.button())
+            painter.setPen(palette.mid().color())
+            painter.drawRect(rect.adjusted(0, 0, -1, -1))
+            icon = self.icons.get(self.model.cells[index])
+            if icon is not None:
+                icon.paint(painter, rect)
+
+    def mouseReleaseEvent(self, event):
+        if event.button() != Qt.LeftButton or not self.interactive:
+            return
+        index = self.cell_at(event.pos())
+        if index >= 0 and self.model.cells[index] == '-':
+            self.clicked.emit(index)
@@ -0,0 +1,236 @@
+"""
+The tic tac toe engine, without any Qt dependency.
+
+Boards are lists of N*N one character strings: 'X', '0' or '-' for an
+empty cell. Importing this module (or anything it imports) never loads
+PyQt5, so batch jobs and services can use the engine without a display.
+"""
+
+import json
+import os
+import sqlite3
+import time
+
+from bitboard import STANDARD, Position
+from mcts import MCTS
+from parallel import ParallelSearch
+from positioncache import PositionCache
+from search import SOLVED, Searcher, SearchStats
+from solutions import DEFAULT_PATH, SolutionTable
+from tablebase import Tablebase, default_path
+from transposition import TranspositionTable
+
+
+def isWin(board, k=None):
+    """
+    GIven a board checks if it is in a winning state.
+
+    Arguments:
+          board: a list containing X,O or -.
+          k: stones in a row needed to win, the board size by default
+
+    Return Value:
+           True if board in winning state. Else False
+    """
+    return Position.from_board(board, k).is_win()
+
+
+def check_win(board, player, k=None):
+    """
+    Checks the board after player has moved. The game is a draw once
+    the board is full or every line holds stones of both sides.
+
+    Return Value:
+        -1 if X has just won, 1 if 0 has just won, 0 for a draw and 2
+        while the game goes on
+    """
+    position = Position.from_board(board, k)
+    if position.is_win():
+        if player == 'X':
+            return -1
+        else:
+            return 1
+
+    if '-' not in board or position.is_dead():
+        return 0
+    return 2
+
+
+def play_move(lines, cell, player):
+    """
+    Adds player's stone on cell to lines (a LineCounts) and checks the
+    game, looking only at the lines through cell. A game nobody can win
+    any more is a draw, as with check_win.
+
+    Return Value:
+        the same as check_win
+    """
+    if lines.make(cell, player == 'X'):
+        if player == 'X':
+            return -1
+        else:
+            return 1
+
+    if lines.is_dead():
+        return 0
+    return 2
+
+
+class Engine(object):
+    """
+    Chooses moves for either player. Transposition tables are kept for
+    the engine's lifetime, so repeated positions cost a lookup.
+
+    Arguments:
+        mode: 'alphabeta', 'minimax', 'mcts' or 'parallel' (alphabeta
+        split across a process per CPU, see parallel.py)
+        moveTime: seconds per searched move, None for no limit
+        solutions: path of the 3x3 solution table, None to always search
+        tableSize: most entries in each transposition table
+        k: stones in a row needed to win, the board size by default
+        statsLog: optional path; the SearchStats of every move are
+        appended to it as JSON lines
+        cache: optional path of a PositionCache; positions are looked up
+        there before searching, and those solved to the end are stored
+        tablebases: directory searched for tablebase files (named as by
+        tablebase.default_path), None to never use them
+
+    The SearchStats of the last move are kept in lastStats.
+    """
+
+    MODES = Searcher.MODES + ('mcts', 'parallel')
+
+    def __init__(self, mode='alphabeta', moveTime=0.05,
+                 solutions=DEFAULT_PATH, tableSize=100000, k=None,
+                 statsLog=None, cache=None, tablebases="."):
+        if mode not in self.MODES:
+            raise ValueError("unknown search mode: {}".format(mode))
+        self.mode = mode
+        self.moveTime = moveTime
+        self.tableSize = tableSize
+        self.k = k
+        self.searchers = {}
+        self.trees = {}
+        self.parallelSearches = {}
+        self.tablebaseDir = tablebases
+        self.tablebases = {}
+        self.lastStats = None
+        self.statsLog = open(statsLog, 'a', 1) if statsLog else None
+        self.solutions = None
+        if solutions is not None:
+            try:
+                self.solutions = SolutionTable(solutions)
+            except (OSError, ValueError):
+                pass  # fall back to searching every move
+        self.cache = None
+        if cache is not None:
+            try:
+                self.cache = PositionCache(cache)
+            except sqlite3.Error:
+                pass  # search without it
+
+    def searcher(self, geometry):
+        """Returns the Searcher for a geometry, creating it if needed."""
+        if geometry not in self.searchers:
+            self.searchers[geometry] = Searcher(
+                TranspositionTable(self.tableSize), geometry)
+        return self.searchers[geometry]
+
+    def mcts(self, geometry):
+        if geometry not in self.trees:
+            self.trees[geometry] = MCTS(geometry, timeLimit=self.moveTime)
+        return self.trees[geometry]
+
+    def parallel(self, geometry):
+        """The ParallelSearch for a geometry, created on first use."""
+        if geometry not in self.parallelSearches:
+            self.parallelSearches[geometry] = ParallelSearch(
+                geometry, timeLimit=self.moveTime)
+        return self.parallelSearches[geometry]
+
+    def tablebase(self, geometry):
+        """Returns the Tablebase for a geometry, or None if there is none."""
+        if self.tablebaseDir is None:
+            return None
+        if geometry not in self.tablebases:
+            path = os.path.join(self.tablebaseDir,
+                                default_path(geometry.size, geometry.k))
+            try:
+                self.tablebases[geometry] = Tablebase(path)
+            except (OSError, ValueError):
+                self.tablebases[geometry] = None
+        return self.tablebases[geometry]
+
+    def nextMove(self, board, player, cancel=None):
+        """
+        Computes the next move for a player given the current board state
+        and also computes if the player will win or not.
+
+        Arguments:
+            board: list containing X,- and O
+            player: one character string 'X' or 'O'
+            cancel: optional threading.Event; the search raises
+            SearchCancelled once it is set
+
+        Return Value:
+            willwin: 1 if 'X' is in winning state, 0 if the game is draw
+            and -1 if 'O' is winning
+            nextmove: position where the player can play the next move so
+            that the player wins or draws or delays the loss
+        """
+        start = time.perf_counter()
+        position = Position.from_board(board, self.k)
+        willwin, move, stats = self._choose(position, player == 'X', cancel)
+        if stats.mode in ('opening', 'table', 'tablebase', 'cache'):
+            stats.elapsed = time.perf_counter() - start
+        self.lastStats = stats
+        if self.statsLog is not None:
+            self.statsLog.write(json.dumps(stats.as_dict()) + "\n")
+        return willwin, move
+
+    def _choose(self, position, xToMove, cancel):
+        """Returns (willwin, move, stats) for nextMove."""
+        if not position.x | position.o:
+            return (0, position.geometry.order[0],
+                    SearchStats('opening', depth=SOLVED))
+        if self.solutions is not None and position.geometry is STANDARD:
+            solved = self.solutions.lookup(position.x, position.o, xToMove)
+            if solved is not None:
+                stats = SearchStats('table', tableHits=1, depth=SOLVED)
+                return solved + (stats,)
+        tablebase = self.tablebase(position.geometry)
+        if tablebase is not None:
+            solved = tablebase.lookup(position.x, position.o, xToMove)
+            if solved is not None:
+                stats = SearchStats('tablebase', tableHits=1, depth=SOLVED)
+                return solved + (stats,)
+        if self.cache is not None:
+            try:
+                solved = self.cache.lookup(position.geometry, position.x,
+                                           position.o, xToMove)
+            except sqlite3.Error:
+                solved = None  # e.g. locked by another process; search
+            if solved is not None:
+                stats = SearchStats('cache', tableHits=1, depth=SOLVED)
+                return solved + (stats,)
+        if self.mode == 'mcts':
+            tree = self.mcts(position.geometry)
+            willwin, move = tree.search(position.x, position.o, xToMove,
+                                        cancel)
+            return willwin, move, tree.stats
+        if self.mode == 'parallel':
+            searcher = self.parallel(position.geometry)
+            score, move = searcher.search(position.x, position.o, xToMove,
+                                          cancel)
+        else:
+            searcher = self.searcher(position.geometry)
+            score, move = searcher.search(position.x, position.o, xToMove,
+                                          self.mode, cancel, self.moveTime)
+        if self.cache is not None and searcher.depthReached == SOLVED:
+            try:
+                self.cache.store(position.geometry, position.x, position.o,
+                                 xToMove, score, move)
+            except sqlite3.Error:
+                pass  # the move stands; it just is not kept
+        # a depth limited search can stop on a heuristic score
+        return int(score), move, searcher.stats
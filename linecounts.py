@@ -0,0 +1,90 @@
+"""
+Per-line stone counts of a position, updated move by move.
+
+A LineCounts keeps, for every winning line of a geometry, how many
+stones each side has on it. make() and unmake() touch only the lines
+through the cell played, so a win is found by looking at those lines
+alone, and the number of lines still open to either side is always at
+hand: once it drops to zero the game is a dead draw, even though the
+board is not full yet. The heuristic of Searcher.evaluate (stones on
+lines the opponent has not blocked) is kept up to date the same way, in
+score.
+"""
+
+from bitboard import STANDARD
+
+
+class LineCounts(object):
+    """
+    Stones of each side on every line of geometry, starting from the
+    position x, o (bitboards, see bitboard.py).
+    """
+
+    __slots__ = ('geometry', 'xCounts', 'oCounts', 'live', 'score')
+
+    def __init__(self, geometry=STANDARD, x=0, o=0):
+        self.geometry = geometry
+        self.xCounts = [0] * len(geometry.lines)
+        self.oCounts = [0] * len(geometry.lines)
+        # lines that do not hold stones of both sides
+        self.live = len(geometry.lines)
+        # X's stones on lines free of 0, less 0's on lines free of X
+        self.score = 0
+        for i in range(geometry.cells):
+            if x >> i & 1:
+                self.make(i, True)
+            elif o >> i & 1:
+                self.make(i, False)
+
+    def make(self, cell, isX):
+        """
+        Adds a stone on cell.
+
+        Return Value:
+            True if the stone completes a line
+        """
+        if isX:
+            mine, theirs, sign = self.xCounts, self.oCounts, 1
+        else:
+            mine, theirs, sign = self.oCounts, self.xCounts, -1
+        k = self.geometry.k
+        won = False
+        gain = 0
+        for line in self.geometry.cellLines[cell]:
+            count = mine[line] + 1
+            mine[line] = count
+            blocked = theirs[line]
+            if blocked:
+                if count == 1:
+                    # the line stops counting for the other side
+                    self.live -= 1
+                    gain += blocked
+            else:
+                gain += 1
+                if count == k:
+                    won = True
+        self.score += sign * gain
+        return won
+
+    def unmake(self, cell, isX):
+        """Takes back a stone added on cell by make()."""
+        if isX:
+            mine, theirs, sign = self.xCounts, self.oCounts, 1
+        else:
+            mine, theirs, sign = self.oCounts, self.xCounts, -1
+        loss = 0
+        for line in self.geometry.cellLines[cell]:
+            count = mine[line] - 1
+            mine[line] = count
+            blocked = theirs[line]
+            if blocked:
+                if not count:
+                    self.live += 1
+                    loss += blocked
+            else:
+                loss += 1
+        self.score -= sign * loss
+
+    def is_dead(self):
+        """True if neither side can complete a line any more."""
+        return not self.live
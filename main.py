@@ -17,13 +17,19 @@
 import os
 import random
 import sys
+import threading
 
 from PyQt5.QtCore import *
 from PyQt5.QtGui import *
 from PyQt5.QtWidgets import *
-from PyQt5.QtMultimedia import QSoundEffect
 
+import engine
+from board import BoardModel
 from Dialog import *
+from linecounts import LineCounts
+from records import RecordWriter
+from sounds import SoundManager
+from worker import SearchWorker
 from tictactoe_ui import Ui_tictactoe
 
 
@@ -36,21 +42,9 @@ class Game(QMainWindow, Ui_tictactoe):
         # Shows only the close button
         self.setWindowFlags(Qt.WindowCloseButtonHint)
 
-        circleSound = QSoundEffect()
-        circleSound.setSource(QUrl.fromLocalFile("circle.wav"))
-        circleSound.setVolume(0.25)
-        crossSound = QSoundEffect()
-        crossSound.setSource(QUrl.fromLocalFile("cross.wav"))
-        crossSound.setVolume(0.25)
-        winSound = QSoundEffect()
-        winSound.setSource(QUrl.fromLocalFile("win.wav"))
-        winSound.setVolume(0.25)
-        loseSound = QSoundEffect()
-        loseSound.setSource(QUrl.fromLocalFile("lose.wav"))
-        loseSound.setVolume(0.25)
-
-        self.sounds = dict(circle=circleSound, cross=crossSound, win=winSound,
-                           lose=loseSound)
+        # loaded in the background once the window is up, see showEvent
+        self.sounds = SoundManager(
+            self, enabled=not os.environ.get("TICTACTOE_NO_SOUND"))
 
         xIconPath = os.path.join("Icons", "x.png")
         oIconPath = os.path.join("Icons", "o.png")
@@ -58,84 +52,105 @@ class Game(QMainWindow, Ui_tictactoe):
         self.xIcon = QIcon(xIconPath)
         self.oIcon = QIcon(oIconPath)
 
-        # To make the icons appear in full color while disabled
-        self.xIcon.addPixmap(QPixmap(xIconPath), QIcon.Disabled)
-        self.oIcon.addPixmap(QPixmap(oIconPath), QIcon.Disabled)
-
-        self.allButtons = self.frame.findChildren(QToolButton)
-        self.availabeButtons = self.allButtons[:]
-        self.board = list('---------')
+        self.model = BoardModel(3, self)
+        self.boardWidget.set_model(self.model)
+        self.boardWidget.set_icons(self.xIcon, self.oIcon)
+        self.lines = LineCounts()
+        self.engine = engine.Engine(
+            statsLog=os.environ.get("TICTACTOE_STATS_LOG"),
+            cache=os.environ.get("TICTACTOE_CACHE"))
+        recordsPath = os.environ.get("TICTACTOE_RECORDS")
+        self.records = RecordWriter(recordsPath) if recordsPath else None
         self.defaultPalette = QApplication.palette()
+        self.dialog = Dialog(self)
+
+        # one thread, so searches never share the table concurrently
+        self.searchPool = QThreadPool(self)
+        self.searchPool.setMaxThreadCount(1)
+        self.searchToken = 0
+        self.playerMove = -1  # X's move awaiting the reply
+        self.searchCancel = threading.Event()
+
+        self.actionShow_Stats = QAction("Show Search Stats", self)
+        self.actionShow_Stats.setCheckable(True)
+        self.menuNew.insertAction(self.action_Exit, self.actionShow_Stats)
+        self.actionSounds = QAction("Sounds", self)
+        self.actionSounds.setCheckable(True)
+        self.actionSounds.setChecked(self.sounds.enabled)
+        self.menuNew.insertAction(self.action_Exit, self.actionSounds)
+        self.menuNew.insertSeparator(self.action_Exit)
 
         # connections
-        for button in self.allButtons:
-            button.clicked.connect(self.button_clicked)
+        self.boardWidget.clicked.connect(self.button_clicked)
 
         self.actionNew_Game.triggered.connect(self.new_game)
         self.actionDark_Theme.toggled.connect(self.dark_theme)
+        self.actionSounds.toggled.connect(self.sounds.setEnabled)
         self.action_Exit.triggered.connect(self.close)
 
         self.setFocus()  # sets the focus to the main window
         self.new_game()  # starts a new game
 
     def new_game(self):
+        self.cancel_search()
         self.reset()
 
+    def cancel_search(self):
+        """Aborts any in-flight search and drops its result."""
+        self.searchCancel.set()
+        self.searchToken += 1
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        # after the first frame has been painted
+        self.sounds.preload(delay=100)
+
+    def closeEvent(self, event):
+        self.cancel_search()
+        self.searchPool.waitForDone()
+        if self.records is not None:
+            self.records.close()
+        super().closeEvent(event)
+
     def reset(self):
-        self.frame.setEnabled(True)
-        self.availabeButtons = self.allButtons[:]
-        self.board = list('---------')
+        self.boardWidget.interactive = True
+        self.model.reset()
+        self.lines = LineCounts()
+        if self.records is not None:
+            self.records.start(self.model.size)
         self.statusbar.showMessage("You are X. You play first")
 
-        for button in self.availabeButtons:
-            button.setText("")
-            button.setIcon(QIcon())
-            button.setEnabled(True)
-
     def end_game(self, state):
         """Ends the game"""
+        if self.records is not None and state in (1, 2, 3):
+            self.records.finish({1: 'X', 2: '0', 3: '-'}[state])
 
         if state == 1:
-            self.sounds["win"].play()
-            Dialog(self, state).show()
-
-            for button in self.availabeButtons:
-                button.setEnabled(False)
-            self.availabeButtons.clear()
+            self.sounds.play("win")
+            self.dialog.show_result(state)
+            self.boardWidget.interactive = False
             return True
 
         elif state == 2:
-            self.sounds["lose"].play()
-            Dialog(self, state).show()
-
-            for button in self.availabeButtons:
-                button.setEnabled(False)
-            self.availabeButtons.clear()
+            self.sounds.play("lose")
+            self.dialog.show_result(state)
+            self.boardWidget.interactive = False
             return True
 
         elif state == 3:
-            Dialog(self, state).show()
-
-            for button in self.allButtons:
-                button.setEnabled(False)
+            self.dialog.show_result(state)
+            self.boardWidget.interactive = False
             return True
         return False
 
-    def button_clicked(self):
-        button = self.sender()
-
-        buttonName = str(button.objectName())
-        buttonIndex = int(buttonName[-1]) - 1
-
-        self.board[buttonIndex] = 'X'
+    def button_clicked(self, buttonIndex):
+        """Plays X on the empty cell the player clicked."""
+        self.model.set_cell(buttonIndex, 'X')
+        if self.records is not None:
+            self.records.move(buttonIndex)
+        self.sounds.play("cross")
 
-        self.sounds["cross"].play()
-        button.setText("1")
-        button.setIcon(self.xIcon)
-        button.setEnabled(False)
-        self.availabeButtons.remove(button)
-
-        winTest = self.check_win('X')
+        winTest = self.check_win('X', buttonIndex)
         if winTest != 2:
             if winTest == 1:
                 self.end_game(1)
@@ -147,34 +162,40 @@ class Game(QMainWindow, Ui_tictactoe):
             self.end_game(3)
             return
 
-        self.frame.setEnabled(False)
+        self.boardWidget.interactive = False
+        self.playerMove = buttonIndex
         self.com_play()
 
     def com_play(self):
-        win, buttonIndex = self.nextMove(self.board, '0')
+        """Starts searching for the computer's move on a worker thread."""
+        self.searchCancel = threading.Event()
+        worker = SearchWorker(self.searchToken, self.engine.nextMove,
+                              self.model.cells[:], '0', self.searchCancel)
+        worker.signals.finished.connect(self.com_move)
+        worker.signals.error.connect(self.com_failed)
+        self.searchPool.start(worker)
+
+    def com_move(self, token, win, buttonIndex):
+        """Plays the computer's move once its search has finished."""
+        if token != self.searchToken:
+            return  # result of a search from an abandoned game
 
         msg = "This game is headed towards a DRAW!"
-        if win is -1:
+        if win == -1:
             msg = "Soon you are going to LOOSE :("
-        if win is 1:
+        if win == 1:
             msg = "Soon you are going to WIN :)"
+        stats = self.engine.lastStats
+        if self.actionShow_Stats.isChecked() and stats is not None:
+            msg += "  ({})".format(stats.summary())
         self.statusbar.showMessage(msg)
 
-        self.board[buttonIndex] = '0'
-
-        for buttonAvail in self.availabeButtons:
-            buttonName = str(buttonAvail.objectName())
-            buttonIndexNew = int(buttonName[-1]) - 1
-            if buttonIndexNew == buttonIndex:
-                button = buttonAvail
-                self.sounds["circle"].play()
-                button.setText("2")
-                button.setIcon(self.oIcon)
-                button.setEnabled(False)
-                self.availabeButtons.remove(button)
-                break
-
-        winTest = self.check_win('0')
+        self.model.set_cell(buttonIndex, '0')
+        if self.records is not None:
+            self.records.move(buttonIndex)
+        self.sounds.play("circle")
+
+        winTest = self.check_win('0', buttonIndex)
         if winTest != 2:
             if winTest == 1:
                 self.end_game(2)
@@ -186,106 +207,26 @@ class Game(QMainWindow, Ui_tictactoe):
             self.end_game(3)
             return
 
-        self.frame.setEnabled(True)
-
-    def isWin(self, board):
-        """
-        GIven a board checks if it is in a winning state.
-
-        Arguments:
-              board: a list containing X,O or -.
+        self.boardWidget.interactive = True
 
-        Return Value:
-               True if board in winning state. Else False
+    def com_failed(self, token, message):
         """
-        #  check if any of the rows has winning combination
-        for i in range(3):
-            if (
-                    len(set(board[i * 3:i * 3 + 3])) is 1 and
-                    board[i * 3] is not '-'
-               ):
-                return True
-
-        # check if any of the Columns has winning combination
-        for i in range(3):
-            if (
-                    (board[i] is board[i + 3]) and
-                    (board[i] is board[i + 6]) and
-                    board[i] is not '-'
-               ):
-                return True
-
-        # 2,4,6 and 0,4,8 cases
-        if (
-                board[0] is board[4] and
-                board[4] is board[8] and
-                board[4] is not '-'
-           ):
-            return True
-
-        if (
-                board[2] is board[4] and
-                board[4] is board[6] and
-                board[4] is not '-'
-           ):
-            return True
-
-        return False
-
-    def nextMove(self, board, player):
-        """
-        Computes the next move for a player given the current board state
-        and also computes if the player will win or not.
-
-        Arguments:
-            board: list containing X,- and O
-            player: one character string 'X' or 'O'
-
-        Return Value:
-            willwin: 1 if 'X' is in winning state, 0 if the game is draw
-            and -1 if 'O' is winning
-            nextmove: position where the player can play the next move so
-            that the player wins or draws or delays the loss
+        Takes back the player's last move when the search for the reply
+        has failed, so the player can try again.
         """
-        if len(set(board)) == 1:
-            return 0, 4
-        nextplayer = 'X' if player == '0' else '0'
-        if self.isWin(board):
-            if player is 'X':
-                return -1, -1
-            else:
-                return 1, -1
-        res_list = []
-        c = board.count('-')
-        if c is 0:
-            return 0, -1
-        _list = []
-        for i in range(len(board)):
-            if board[i] == '-':
-                _list.append(i)
-        for i in _list:
-            board[i] = player
-            ret, move = self.nextMove(board, nextplayer)
-            res_list.append(ret)
-            board[i] = '-'
-        if player is 'X':
-            maxele = max(res_list)
-            return maxele, _list[res_list.index(maxele)]
-        else:
-            minele = min(res_list)
-            return minele, _list[res_list.index(minele)]
-
-    def check_win(self, player):
-        if self.isWin(self.board):
-            if player is 'X':
-                return -1
-            else:
-                return 1
-
-        c = self.board.count('-')
-        if c is 0:
-            return 0
-        return 2
+        if token != self.searchToken:
+            return
+        self.model.set_cell(self.playerMove, '-')
+        self.lines.unmake(self.playerMove, True)
+        if self.records is not None:
+            self.records.take_back()
+        self.statusbar.showMessage(
+            "The computer could not move ({}). Play again".format(message))
+        self.boardWidget.interactive = True
+
+    def check_win(self, player, buttonIndex):
+        """Records player's move on buttonIndex and checks the game."""
+        return engine.play_move(self.lines, buttonIndex, player)
 
     def dark_theme(self):
         """Changes the theme between dark and normal"""
@@ -306,12 +247,18 @@ class Game(QMainWindow, Ui_tictactoe):
             plt.setColor(QPalette.HighlightedText, Qt.black)
             plt.setColor(QPalette.Disabled, QPalette.Text, Qt.darkGray)
             plt.setColor(QPalette.Disabled, QPalette.ButtonText, Qt.darkGray)
-            app.setPalette(plt)
+            QApplication.setPalette(plt)
             return
 
-        app.setPalette(self.defaultPalette)
+        QApplication.setPalette(self.defaultPalette)
+
+
+def main():
+    app = QApplication(sys.argv)
+    game = Game()
+    game.show()
+    sys.exit(app.exec_())
+
 
-app = QApplication(sys.argv)
-game = Game()
-game.show()
-app.exec_()
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+Monte Carlo tree search (UCT) over bitboard positions.
+
+An anytime alternative to the minimax searcher for boards too large to
+search exhaustively: it runs random playouts until it has done the
+configured number or its time budget runs out, and plays the most
+visited move. Results are from the point of view of X, like search.py.
+"""
+
+import math
+import random
+import time
+
+from bitboard import STANDARD
+from search import SearchCancelled, SearchStats
+
+# mean playout result beyond which a move is reported as a win for X
+# (or, negated, for 0)
+WIN_THRESHOLD = 0.5
+
+# fewest playouts through a move before its result is forecast as a win
+MIN_VISITS = 20
+
+
+class Node(object):
+    """A position in the search tree and its playout statistics."""
+
+    __slots__ = ('x', 'o', 'xToMove', 'move', 'parent', 'children',
+                 'untried', 'visits', 'total', 'result')
+
+    def __init__(self, x, o, xToMove, move, parent, geometry):
+        self.x = x
+        self.o = o
+        self.xToMove = xToMove
+        self.move = move
+        self.parent = parent
+        self.children = []
+        self.visits = 0
+        self.total = 0  # sum of playout results, X's point of view
+
+        if parent is None:
+            won, lost = geometry.has_line(x), geometry.has_line(o)
+        else:
+            # only the move just made can have completed a line
+            won = not xToMove and geometry.has_line_through(x, move)
+            lost = xToMove and geometry.has_line_through(o, move)
+        if won:
+            self.result = 1
+        elif lost:
+            self.result = -1
+        elif x | o == geometry.full:
+            self.result = 0
+        else:
+            self.result = None
+
+        occupied = x | o
+        self.untried = [] if self.result is not None else [
+            i for i in range(geometry.cells) if not occupied >> i & 1
+        ]
+
+
+class MCTS(object):
+    """
+    UCT search on one board geometry.
+
+    Arguments:
+        playouts: the most playouts to run per search
+        exploration: the UCT exploration constant
+        timeLimit: optional limit in seconds per search
+        seed: seed for the playout random number generator
+    """
+
+    def __init__(self, geometry=STANDARD, playouts=10000, exploration=1.4,
+                 timeLimit=None, seed=None):
+        self.geometry = geometry
+        self.playouts = playouts
+        self.exploration = exploration
+        self.timeLimit = timeLimit
+        self.random = random.Random(seed)
+        self.stats = None
+
+    def search(self, x, o, xToMove, cancel=None):
+        """
+        Returns (willwin, move) like Searcher.search. willwin is 1 or -1
+        when the chosen move's mean playout result is past
+        WIN_THRESHOLD for X or 0 over at least MIN_VISITS playouts, and
+        0 otherwise.
+        """
+        root = self.run(x, o, xToMove, cancel)
+        if root.result is not None:
+            return root.result, -1
+        if not root.children:
+            return 0, root.untried[0]  # out of time before any playout
+        best = max(root.children, key=lambda child: child.visits)
+        return self.willwin(best.total, best.visits), best.move
+
+    def statistics(self, x, o, xToMove, cancel=None):
+        """Returns {move: (visits, total)} for the root's children."""
+        root = self.run(x, o, xToMove, cancel)
+        return {child.move: (child.visits, child.total)
+                for child in root.children}
+
+    @staticmethod
+    def willwin(total, visits):
+        """The forecast for a move from its playout statistics."""
+        if visits < MIN_VISITS:
+            return 0  # too few playouts to tell
+        value = total / visits
+        if value > WIN_THRESHOLD:
+            return 1
+        if value < -WIN_THRESHOLD:
+            return -1
+        return 0
+
+    def run(self, x, o, xToMove, cancel=None):
+        """
+        Runs the playouts and returns the root of the search tree.
+        Counters for the search are left in stats: nodes is the size of
+        the tree, leaves the number of playouts and depth the deepest
+        node reached.
+        """
+        geometry = self.geometry
+        root = Node(x, o, xToMove, -1, None, geometry)
+        self.stats = stats = SearchStats('mcts', nodes=1)
+        start = time.perf_counter()
+        deadline = None
+        if self.timeLimit is not None:
+            deadline = time.monotonic() + self.timeLimit
+
+        for _ in range(self.playouts):
+            if cancel is not None and cancel.is_set():
+                raise SearchCancelled()
+            if deadline is not None and time.monotonic() > deadline:
+                break
+
+            node = root
+            depth = 0
+            while not node.untried and node.children:
+                node = self.select(node)
+                depth += 1
+
+            if node.untried:
+                index = self.random.randrange(len(node.untried))
+                move = node.untried[index]
+                node.untried[index] = node.untried[-1]
+                node.untried.pop()
+                bit = 1 << move
+                if node.xToMove:
+                    child = Node(node.x | bit, node.o, False, move, node,
+                                 geometry)
+                else:
+                    child = Node(node.x, node.o | bit, True, move, node,
+                                 geometry)
+                node.children.append(child)
+                node = child
+                depth += 1
+                stats.nodes += 1
+
+            result = self.playout(node)
+            stats.leaves += 1
+            stats.depth = max(stats.depth, depth)
+            while node is not None:
+                node.visits += 1
+                node.total += result
+                node = node.parent
+        stats.elapsed = time.perf_counter() - start
+        return root
+
+    def select(self, node):
+        """Picks the child with the best upper confidence bound."""
+        logVisits = math.log(node.visits)
+        sign = 1 if node.xToMove else -1
+        best = bestScore = None
+        for child in node.children:
+            score = (sign * child.total / child.visits +
+                     self.exploration * math.sqrt(logVisits / child.visits))
+            if bestScore is None or score > bestScore:
+                best, bestScore = child, score
+        return best
+
+    def playout(self, node):
+        """Plays random moves from node to the end of the game."""
+        if node.result is not None:
+            return node.result
+        geometry = self.geometry
+        x, o, xToMove = node.x, node.o, node.xToMove
+        occupied = x | o
+        empty = [i for i in range(geometry.cells) if not occupied >> i & 1]
+        self.random.shuffle(empty)
+        for i in empty:
+            if xToMove:
+                x |= 1 << i
+                if geometry.has_line_through(x, i):
+                    return 1
+            else:
+                o |= 1 << i
+                if geometry.has_line_through(o, i):
+                    return -1
+            xToMove = not xToMove
+        return 0
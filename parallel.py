@@ -0,0 +1,274 @@
+"""
+Root-parallel search across a pool of processes.
+
+In 'alphabeta' mode the root moves are split between tasks, one move
+each, a depth at a time. The first move (the best one of the depth
+before) is searched alone with the full window; the others are then
+searched in parallel with its score as their bound, so a move that is
+no better is refuted cheaply, and once a move is found to win the
+tasks still waiting are cancelled. In 'mcts' mode each worker grows an
+independent tree with its own seed and the root statistics are summed.
+Tasks only carry ints and floats, so nothing but the board travels
+between processes; each worker keeps its own transposition tables
+between tasks.
+"""
+
+import concurrent.futures
+import multiprocessing.util
+import os
+import time
+
+from bitboard import STANDARD, geometry
+from mcts import MCTS
+from search import (SOLVED, SearchCancelled, Searcher, SearchStats,
+                    SearchTimeout)
+
+# per process searchers, keyed by (size, k)
+_searchers = {}
+
+
+def _searcher(size, k):
+    key = (size, k)
+    if key not in _searchers:
+        _searchers[key] = Searcher(geometry=geometry(size, k))
+    return _searchers[key]
+
+
+def search_move(size, k, x, o, xToMove, move, depth, alpha, beta,
+                deadline):
+    """
+    Searches the position after move depth - 1 moves further, within
+    the window alpha, beta. deadline is a time.monotonic() value, which
+    every process on a machine shares.
+
+    Return Value:
+        (move, score, stats); score is None if the deadline passed
+    """
+    bit = 1 << move
+    if xToMove:
+        x |= bit
+    else:
+        o |= bit
+    searcher = _searcher(size, k)
+    try:
+        score, _ = searcher.search_depth(x, o, not xToMove, depth - 1,
+                                         alpha, beta, deadline)
+    except SearchTimeout:
+        score = None
+    return move, score, searcher.stats
+
+
+def grow_tree(size, k, x, o, xToMove, playouts, exploration, timeLimit,
+              seed):
+    """Runs one MCTS tree; returns ({move: (visits, total)}, stats)."""
+    mcts = MCTS(geometry(size, k), playouts, exploration, timeLimit, seed)
+    return mcts.statistics(x, o, xToMove), mcts.stats
+
+
+def _shutdown(executor, pid):
+    # processes forked from this one inherit the finalizer; only the
+    # process that made the pool may shut it down
+    if os.getpid() == pid:
+        executor.shutdown()
+
+
+class ParallelSearch(object):
+    """
+    Spreads a search across a ProcessPoolExecutor.
+
+    Arguments:
+        mode: 'alphabeta' or 'mcts'
+        workers: number of processes, os.cpu_count() by default
+        timeLimit: optional limit in seconds for the whole search; every
+        task runs until the same deadline
+        playouts, exploration: MCTS settings; the playouts are shared
+        out between the trees
+    """
+
+    MODES = ('alphabeta', 'mcts')
+
+    def __init__(self, geometry=STANDARD, mode='alphabeta', workers=None,
+                 timeLimit=None, playouts=10000, exploration=1.4):
+        if mode not in self.MODES:
+            raise ValueError("unknown search mode: {}".format(mode))
+        self.geometry = geometry
+        self.mode = mode
+        self.workers = workers or os.cpu_count() or 1
+        self.timeLimit = timeLimit
+        self.playouts = playouts
+        self.exploration = exploration
+        self.executor = concurrent.futures.ProcessPoolExecutor(self.workers)
+        # a search made inside a pool process (an engine of the server or
+        # a tournament) would otherwise keep that process waiting on
+        # these workers when it exits, since atexit hooks do not run
+        # there; this must run before the queues' own finalizers
+        # (priority 10) stop them sending the workers' stop signal
+        multiprocessing.util.Finalize(self, _shutdown,
+                                      (self.executor, os.getpid()),
+                                      exitpriority=20)
+        self.depthReached = None
+        self.stats = None
+
+    def close(self):
+        self.executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def search(self, x, o, xToMove, cancel=None):
+        """
+        Returns (willwin, move) like Searcher.search. If cancel is set
+        the search raises SearchCancelled without waiting for tasks
+        that are already running; their results are dropped. The
+        counters of all tasks are summed into stats.
+        """
+        start = time.perf_counter()
+        self.stats = SearchStats(self.mode, depth=SOLVED)
+        try:
+            return self._search(x, o, xToMove, cancel)
+        finally:
+            self.stats.elapsed = time.perf_counter() - start
+
+    def _search(self, x, o, xToMove, cancel):
+        geometry = self.geometry
+        if geometry.has_line(x):
+            return 1, -1
+        if geometry.has_line(o):
+            return -1, -1
+        occupied = x | o
+        moves = [i for i in geometry.order if not occupied >> i & 1]
+        if not moves:
+            return 0, -1
+
+        if self.mode == 'alphabeta':
+            return self._deepen(x, o, xToMove, moves, cancel)
+
+        size, k = geometry.size, geometry.k
+        playouts = max(1, self.playouts // self.workers)
+        futures = [
+            self.executor.submit(grow_tree, size, k, x, o, xToMove,
+                                 playouts, self.exploration, self.timeLimit,
+                                 seed)
+            for seed in range(self.workers)
+        ]
+        return self._merge_trees(self._wait(futures, cancel), moves)
+
+    def _wait(self, futures, cancel):
+        pending = set(futures)
+        while pending:
+            if cancel is not None and cancel.is_set():
+                for future in pending:
+                    future.cancel()
+                raise SearchCancelled()
+            _, pending = concurrent.futures.wait(pending, timeout=0.01)
+        return [future.result() for future in futures]
+
+    def _deepen(self, x, o, xToMove, moves, cancel):
+        """
+        Iterative deepening over _search_depth, which runs to the end of
+        the game at once when there is no time limit.
+        """
+        deadline = None
+        depths = [SOLVED]
+        if self.timeLimit is not None:
+            deadline = time.monotonic() + self.timeLimit
+            depths = range(1, len(moves) + 1)
+
+        self.depthReached = 0
+        result = None
+        for depth in depths:
+            found = self._search_depth(x, o, xToMove, moves, depth, deadline,
+                                       cancel)
+            if found is None:
+                break  # out of time; keep the last complete depth
+            result = found
+            self.depthReached = depth
+            score, move = found
+            if depth >= len(moves) or score in (-1, 1):
+                self.depthReached = SOLVED
+                break
+            # the best move so far goes first at the next depth
+            moves = [move] + [i for i in moves if i != move]
+        self.stats.depth = self.depthReached
+
+        if result is None:
+            return 0, moves[0]
+        # a depth limited search can stop on a heuristic score
+        return int(result[0]), result[1]
+
+    def _search_depth(self, x, o, xToMove, moves, depth, deadline, cancel):
+        """
+        Searches the root moves depth moves ahead, the first alone and
+        the rest in parallel with its score as their bound.
+
+        Return Value:
+            (score, move), or None if the deadline passed first
+        """
+        size, k = self.geometry.size, self.geometry.k
+        win = 1 if xToMove else -1
+
+        def submit(move, alpha, beta):
+            return self.executor.submit(search_move, size, k, x, o, xToMove,
+                                        move, depth, alpha, beta, deadline)
+
+        first = submit(moves[0], -1, 1)
+        bestMove, bestScore, stats = self._wait([first], cancel)[0]
+        self.stats.add(stats)
+        if bestScore is None:
+            return None
+        if bestScore == win or len(moves) == 1:
+            return bestScore, bestMove
+
+        # only a score past bestScore matters; the window's far end is
+        # the best possible score, so such a score is always exact
+        if xToMove:
+            alpha, beta = bestScore, 1
+        else:
+            alpha, beta = -1, bestScore
+        futures = [submit(move, alpha, beta) for move in moves[1:]]
+        for move, score, stats in self._completed(futures, cancel):
+            self.stats.add(stats)
+            if score is None:
+                return None
+            # ties go to the move searched first
+            if score * win > bestScore * win:
+                bestMove, bestScore = move, score
+                if score == win:
+                    break
+        return bestScore, bestMove
+
+    def _completed(self, futures, cancel):
+        """
+        Yields the results of futures as they finish. Tasks that have not
+        started are cancelled when the caller stops early.
+        """
+        pending = set(futures)
+        try:
+            while pending:
+                if cancel is not None and cancel.is_set():
+                    raise SearchCancelled()
+                done, pending = concurrent.futures.wait(
+                    pending, timeout=0.01,
+                    return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def _merge_trees(self, results, moves):
+        visits = dict.fromkeys(moves, 0)
+        totals = dict.fromkeys(moves, 0)
+        self.stats.depth = 0
+        for statistics, stats in results:
+            self.stats.nodes += stats.nodes
+            self.stats.leaves += stats.leaves
+            self.stats.depth = max(self.stats.depth, stats.depth)
+            for move, (count, total) in statistics.items():
+                visits[move] += count
+                totals[move] += total
+        best = max(moves, key=lambda move: visits[move])
+        return MCTS.willwin(totals[best], visits[best]), best
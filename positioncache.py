@@ -0,0 +1,86 @@
+"""
+Solved positions kept on disk between runs.
+
+A PositionCache is an SQLite database of positions that a search has
+solved to the end of the game, keyed by board size, win length k and
+the canonical form of the position (see Geometry.canonical), so a solve
+is shared by all 8 symmetric images and paid for only once. Moves are
+stored in the canonical frame and mapped back on lookup.
+
+Several processes can use one database at once; it is opened in WAL
+mode so readers do not wait for a writer.
+"""
+
+import sqlite3
+
+DEFAULT_PATH = "positions.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS positions (
+    size INTEGER NOT NULL,
+    k INTEGER NOT NULL,
+    x BLOB NOT NULL,
+    o BLOB NOT NULL,
+    xToMove INTEGER NOT NULL,
+    score INTEGER NOT NULL,
+    move INTEGER NOT NULL,
+    PRIMARY KEY (size, k, x, o, xToMove)
+) WITHOUT ROWID
+"""
+
+
+class PositionCache(object):
+    """
+    The solved positions in the SQLite database at path, which is
+    created if it does not exist.
+    """
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        # the game searches on a worker thread; the engine never uses
+        # the cache from two threads at once
+        self.db = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(SCHEMA)
+        self.db.commit()
+        self.hits = self.misses = 0
+
+    def _key(self, geometry, x, o, xToMove):
+        cx, co, t = geometry.canonical(x, o)
+        width = (geometry.cells + 7) // 8
+        key = (geometry.size, geometry.k, cx.to_bytes(width, 'little'),
+               co.to_bytes(width, 'little'), int(xToMove))
+        return key, t
+
+    def lookup(self, geometry, x, o, xToMove):
+        """
+        Looks a position up.
+
+        Return Value:
+            (score, move) as a full search would return them, or None if
+            the position has not been stored
+        """
+        key, t = self._key(geometry, x, o, xToMove)
+        row = self.db.execute(
+            "SELECT score, move FROM positions WHERE size = ? AND k = ? "
+            "AND x = ? AND o = ? AND xToMove = ?", key).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row[0], geometry.from_canonical_move(row[1], t)
+
+    def store(self, geometry, x, o, xToMove, score, move):
+        """Stores the result of a search that reached the game's end."""
+        key, t = self._key(geometry, x, o, xToMove)
+        self.db.execute(
+            "INSERT OR REPLACE INTO positions VALUES (?, ?, ?, ?, ?, ?, ?)",
+            key + (score, geometry.to_canonical_move(move, t)))
+        self.db.commit()
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM positions").fetchone()[0]
+
+    def close(self):
+        self.db.close()
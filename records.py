@@ -0,0 +1,163 @@
+"""
+A compact binary format for game records, written and read as a stream.
+
+A file starts with the 8 byte header MAGIC + version + 3 pad bytes, then
+holds any number of games, each
+
+    START  size  k  started         1 + 1 + 1 + 4 bytes
+    move   move  ...                1 byte per move, the cell index
+    END                             1 byte: X_WON, O_WON or DRAWN
+
+started is the Unix time the game began, as a little endian uint32.
+Marker bytes are above any cell index, so a game cut short (the program
+closed mid-game) is recognised by the START of the next game or the end
+of the file, and read back with winner None. That leaves room for
+boards of up to MAX_CELLS cells (15x15).
+
+RecordWriter appends games to a file as they are played; read_games()
+yields them one at a time, so files of any size are read in constant
+memory.
+"""
+
+import collections
+import struct
+import time
+
+MAGIC = b'TTTG'
+VERSION = 1
+HEADER = struct.Struct('<4sBxxx')
+GAME = struct.Struct('<BBBI')
+
+# marker bytes; cells are numbered below these
+START, X_WON, O_WON, DRAWN = 0xFB, 0xFC, 0xFD, 0xFE
+
+# most cells a recorded board may have (15x15), so every cell index
+# fits in a byte below the markers
+MAX_CELLS = START
+
+ENDS = {'X': X_WON, '0': O_WON, '-': DRAWN}
+WINNERS = {X_WON: 'X', O_WON: '0', DRAWN: '-'}
+
+# bytes read from the file at a time
+READ_SIZE = 1 << 16
+
+# winner is 'X', '0', '-' for a draw, or None for an unfinished game
+GameRecord = collections.namedtuple(
+    'GameRecord', ('size', 'k', 'started', 'moves', 'winner'))
+
+
+class RecordWriter(object):
+    """
+    Appends game records to the file at path, creating it if needed.
+    The game being played is kept in memory, so a move can be taken
+    back, and written when it ends; a game cut short is written when
+    the next one starts or the writer is closed.
+    """
+
+    def __init__(self, path):
+        self.file = open(path, 'ab')
+        if self.file.tell() == 0:
+            self.file.write(HEADER.pack(MAGIC, VERSION))
+        self.game = None
+        self.moves = []
+
+    def start(self, size=3, k=None):
+        """
+        Begins a new game; an unfinished one is kept as it is. Raises
+        ValueError for boards of more than MAX_CELLS cells.
+        """
+        if size * size > MAX_CELLS:
+            raise ValueError("cannot record a {0}x{0} board; at most {1} "
+                             "cells fit the format".format(size, MAX_CELLS))
+        self._write()
+        self.game = GAME.pack(START, size, k or size, int(time.time()))
+
+    def move(self, cell):
+        if self.game is None:
+            raise ValueError("no game started")
+        self.moves.append(cell)
+
+    def take_back(self):
+        """Drops the last move of the game being played."""
+        if not self.moves:
+            raise ValueError("no move to take back")
+        self.moves.pop()
+
+    def finish(self, winner):
+        """Ends the game; winner is 'X', '0' or '-' for a draw."""
+        self._write(ENDS[winner])
+
+    def _write(self, end=None):
+        # games are only written once a move has been made
+        if self.game is not None and self.moves:
+            data = self.game + bytes(self.moves)
+            if end is not None:
+                data += bytes((end,))
+            self.file.write(data)
+            self.file.flush()
+        self.game = None
+        self.moves = []
+
+    def close(self):
+        self._write()
+        self.file.close()
+
+
+def read_games(path):
+    """Yields a GameRecord for every game in the file at path."""
+    with open(path, 'rb') as f:
+        header = f.read(HEADER.size)
+        try:
+            magic, version = HEADER.unpack(header)
+        except struct.error:
+            magic = version = None
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("{} is not a game record file".format(path))
+
+        game = None
+        data = b''
+        pos = 0
+        end = False
+        while True:
+            # keep at least a game header in hand, unless at the end
+            while not end and len(data) - pos < GAME.size:
+                chunk = f.read(READ_SIZE)
+                if chunk:
+                    data = data[pos:] + chunk
+                    pos = 0
+                else:
+                    end = True
+            if pos == len(data):
+                break
+
+            byte = data[pos]
+            if byte == START:
+                if len(data) - pos < GAME.size:
+                    raise ValueError("{} ends inside a game "
+                                     "header".format(path))
+                if game is not None:
+                    yield GameRecord(*game, None)
+                _, size, k, started = GAME.unpack_from(data, pos)
+                game = (size, k, started, [])
+                pos += GAME.size
+            elif game is None:
+                raise ValueError("move outside a game in {}".format(path))
+            elif byte in WINNERS:
+                yield GameRecord(*game, WINNERS[byte])
+                game = None
+                pos += 1
+            else:
+                game[3].append(byte)
+                pos += 1
+        if game is not None:
+            yield GameRecord(*game, None)
+
+
+if __name__ == "__main__":
+    import sys
+    counts = collections.Counter()
+    for record in read_games(sys.argv[1]):
+        counts[record.winner] += 1
+    print("{} games: X won {}, 0 won {}, drawn {}, unfinished {}".format(
+        sum(counts.values()), counts['X'], counts['0'], counts['-'],
+        counts[None]))
@@ -0,0 +1,358 @@
+"""
+Game tree search over bitboard positions.
+
+Scores are always from the point of view of X: 1 if X wins, 0 for a
+draw and -1 if 0 wins. Depth limited searches score the positions where
+they stop with a heuristic strictly between -0.5 and 0.5. Every search
+returns a (score, move) pair; move is -1 when the position is already
+won. A position where every line holds stones of both sides is scored
+as a draw straight away, even with empty cells left.
+
+Stone counts per line (see linecounts.py) are updated as moves are made
+and taken back, so only the lines through each move are checked for a
+win, and the heuristic score at the search horizon costs no more than
+a division.
+
+The transposition table is keyed by the canonical form of a position
+(see Geometry.canonical), so all 8 symmetric images share one entry.
+Moves are stored in the canonical frame and mapped back on lookup.
+"""
+
+import time
+
+from bitboard import STANDARD
+from linecounts import LineCounts
+from transposition import TranspositionTable
+
+# bound stored alongside a score in the transposition table
+EXACT, LOWER, UPPER = 0, 1, 2
+
+# depth stored for entries searched to the end of the game
+SOLVED = 1 << 30
+
+
+def ordered_moves(occupied, order, first=-1):
+    """
+    Yields the empty cells in the given order, trying first (if legal)
+    before the rest.
+    """
+    if first >= 0 and not occupied >> first & 1:
+        yield first
+    for i in order:
+        if i != first and not occupied >> i & 1:
+            yield i
+
+
+class SearchStats(object):
+    """Counters and timing for one search."""
+
+    __slots__ = ('mode', 'nodes', 'leaves', 'cutoffs', 'tableHits',
+                 'depth', 'elapsed')
+
+    def __init__(self, mode, nodes=0, leaves=0, cutoffs=0, tableHits=0,
+                 depth=0, elapsed=0.0):
+        self.mode = mode
+        self.nodes = nodes          # positions visited
+        self.leaves = leaves        # finished games and heuristic scores
+        self.cutoffs = cutoffs      # alpha-beta prunes
+        self.tableHits = tableHits  # answers taken from a table
+        self.depth = depth          # moves searched ahead, SOLVED if all
+        self.elapsed = elapsed      # seconds
+
+    @property
+    def nodesPerSecond(self):
+        return self.nodes / self.elapsed if self.elapsed else 0.0
+
+    def add(self, other):
+        """Adds the counters of other, keeping the shallower depth."""
+        self.nodes += other.nodes
+        self.leaves += other.leaves
+        self.cutoffs += other.cutoffs
+        self.tableHits += other.tableHits
+        self.depth = min(self.depth, other.depth)
+
+    def as_dict(self):
+        """The stats as a JSON-ready dict; depth is None if SOLVED."""
+        stats = {name: getattr(self, name) for name in self.__slots__}
+        if self.depth == SOLVED:
+            stats['depth'] = None
+        stats['nodesPerSecond'] = self.nodesPerSecond
+        return stats
+
+    def summary(self):
+        depth = "full" if self.depth == SOLVED else str(self.depth)
+        return ("{} nodes, depth {}, {} cutoffs, {} table hits, "
+                "{:.1f} ms ({:.0f} nodes/s)".format(
+                    self.nodes, depth, self.cutoffs, self.tableHits,
+                    self.elapsed * 1000, self.nodesPerSecond))
+
+
+class SearchCancelled(Exception):
+    """Raised inside a search once its cancel event has been set."""
+
+
+class SearchTimeout(Exception):
+    """Raised inside a search once its deadline has passed."""
+
+
+class Searcher(object):
+    """
+    Runs searches on one board geometry that share one transposition
+    table. A searcher runs one search at a time.
+    """
+
+    MODES = ('minimax', 'alphabeta')
+
+    def __init__(self, table=None, geometry=STANDARD):
+        self.table = table if table is not None else TranspositionTable()
+        self.geometry = geometry
+        self.cancel = None
+        self.deadline = None
+        self.depthReached = None
+        self.stats = None
+        self.lines = None
+        # divides a heuristic score into (-0.5, 0.5)
+        self.scale = 2.0 * geometry.k * len(geometry.lines) + 1
+        self.nodes = self.leaves = self.cutoffs = self.tableHits = 0
+
+    def search(self, x, o, xToMove, mode='alphabeta', cancel=None,
+               timeLimit=None):
+        """
+        Searches the position with the given mode. If cancel (a
+        threading.Event) is set while the search runs, SearchCancelled
+        is raised. With a timeLimit in seconds, alphabeta runs as an
+        iterative deepening search; the depth it completed is left in
+        depthReached. Counters for the search are left in stats.
+        """
+        if mode not in self.MODES:
+            raise ValueError("unknown search mode: {}".format(mode))
+        self.cancel = cancel
+        self.nodes = self.leaves = self.cutoffs = self.tableHits = 0
+        start = time.perf_counter()
+        try:
+            if mode == 'alphabeta' and timeLimit is not None:
+                score, move, self.depthReached = self.iterative(
+                    x, o, xToMove, timeLimit)
+            else:
+                self.depthReached = SOLVED
+                if mode == 'alphabeta':
+                    score, move = self.alphabeta(x, o, xToMove)
+                else:
+                    score, move = self.minimax(x, o, xToMove)
+            return score, move
+        finally:
+            self.cancel = None
+            self.stats = SearchStats(mode, self.nodes, self.leaves,
+                                     self.cutoffs, self.tableHits,
+                                     self.depthReached,
+                                     time.perf_counter() - start)
+
+    def search_depth(self, x, o, xToMove, depth, alpha=-1, beta=1,
+                     deadline=None):
+        """
+        One alpha-beta search depth moves ahead within the window alpha,
+        beta, for callers that do their own deepening. Scores outside
+        the window are bounds, as in alphabeta. SearchTimeout is raised
+        once time.monotonic() passes deadline. Counters for the search
+        are left in stats.
+        """
+        self.nodes = self.leaves = self.cutoffs = self.tableHits = 0
+        self.deadline = deadline
+        start = time.perf_counter()
+        try:
+            return self.alphabeta(x, o, xToMove, alpha, beta, depth)
+        finally:
+            self.deadline = None
+            self.depthReached = depth
+            self.stats = SearchStats('alphabeta', self.nodes, self.leaves,
+                                     self.cutoffs, self.tableHits, depth,
+                                     time.perf_counter() - start)
+
+    def check_stop(self):
+        if self.cancel is not None and self.cancel.is_set():
+            raise SearchCancelled()
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise SearchTimeout()
+
+    def evaluate(self, x, o):
+        """
+        Heuristic score of an unfinished position: stones on lines the
+        opponent has not yet blocked, scaled into (-0.5, 0.5).
+        """
+        geometry = self.geometry
+        score = 0
+        for line in geometry.lines:
+            if not line & o:
+                score += bin(line & x).count('1')
+            elif not line & x:
+                score -= bin(line & o).count('1')
+        return score / self.scale
+
+    def iterative(self, x, o, xToMove, timeLimit):
+        """
+        Iterative deepening alpha-beta that stops after timeLimit
+        seconds.
+
+        Return Value:
+            (score, move, depth) from the deepest search that completed;
+            depth is SOLVED once the search reached the end of the game
+            and 0 if not even a one move search finished in time
+        """
+        geometry = self.geometry
+        empty = geometry.cells - bin(x | o).count('1')
+        self.deadline = time.monotonic() + timeLimit
+        try:
+            result = None
+            for depth in range(1, empty + 1):
+                try:
+                    score, move = self.alphabeta(x, o, xToMove, depth=depth)
+                except SearchTimeout:
+                    break
+                result = score, move, depth
+                if depth == empty or score in (-1, 1):
+                    return score, move, SOLVED
+        finally:
+            self.deadline = None
+
+        if result is None:
+            move = next(ordered_moves(x | o, geometry.order), -1)
+            return self.evaluate(x, o), move, 0
+        return result
+
+    def minimax(self, x, o, xToMove):
+        """Exhaustive minimax, trying the empty cells in index order."""
+        geometry = self.geometry
+        if geometry.has_line(x) or geometry.has_line(o):
+            self.nodes += 1
+            self.leaves += 1
+            return (1 if geometry.has_line(x) else -1), -1
+        self.lines = LineCounts(geometry, x, o)
+        return self._minimax(x, o, xToMove)
+
+    def _minimax(self, x, o, xToMove):
+        # the position is not won; self.lines holds its line counts
+        geometry = self.geometry
+        lines = self.lines
+        self.nodes += 1
+        occupied = x | o
+        if not lines.live:
+            self.leaves += 1
+            return 0, next(ordered_moves(occupied, range(geometry.cells)),
+                           -1)
+        self.check_stop()
+
+        cx, co, t = geometry.canonical(x, o)
+        key = (cx, co, xToMove)
+        entry = self.table.lookup(key)
+        if entry is not None and entry[2] == EXACT and entry[3] == SOLVED:
+            self.tableHits += 1
+            return entry[0], geometry.from_canonical_move(entry[1], t)
+
+        bestScore = bestMove = None
+        for i in range(geometry.cells):
+            bit = 1 << i
+            if occupied & bit:
+                continue
+            if lines.make(i, xToMove):
+                self.nodes += 1
+                self.leaves += 1
+                score = 1 if xToMove else -1
+            elif xToMove:
+                score, _ = self._minimax(x | bit, o, False)
+            else:
+                score, _ = self._minimax(x, o | bit, True)
+            lines.unmake(i, xToMove)
+            if bestScore is None or (score > bestScore if xToMove
+                                     else score < bestScore):
+                bestScore, bestMove = score, i
+        entry = (bestScore, geometry.to_canonical_move(bestMove, t), EXACT,
+                 SOLVED)
+        self.table.store(key, entry)
+        return bestScore, bestMove
+
+    def alphabeta(self, x, o, xToMove, alpha=-1, beta=1, depth=SOLVED):
+        """
+        Minimax with alpha-beta pruning, looking at most depth moves
+        ahead. Moves are tried in the geometry's order (for 3x3: centre,
+        corners, edges), after any best move cached in the table.
+        """
+        geometry = self.geometry
+        if geometry.has_line(x) or geometry.has_line(o):
+            self.nodes += 1
+            self.leaves += 1
+            return (1 if geometry.has_line(x) else -1), -1
+        self.lines = LineCounts(geometry, x, o)
+        return self._alphabeta(x, o, xToMove, alpha, beta, depth)
+
+    def _alphabeta(self, x, o, xToMove, alpha, beta, depth):
+        # the position is not won; self.lines holds its line counts
+        geometry = self.geometry
+        lines = self.lines
+        self.nodes += 1
+        occupied = x | o
+        if not lines.live:
+            self.leaves += 1
+            return 0, next(ordered_moves(occupied, geometry.order), -1)
+        if depth == 0:
+            self.leaves += 1
+            return lines.score / self.scale, -1
+        self.check_stop()
+        if depth >= geometry.cells - bin(occupied).count('1'):
+            depth = SOLVED
+
+        cx, co, t = geometry.canonical(x, o)
+        key = (cx, co, xToMove)
+        entry = self.table.lookup(key)
+        hashMove = -1
+        if entry is not None:
+            score, move, bound, searched = entry
+            move = geometry.from_canonical_move(move, t)
+            if searched >= depth and (
+                    bound == EXACT or
+                    (bound == LOWER and score >= beta) or
+                    (bound == UPPER and score <= alpha)
+               ):
+                self.tableHits += 1
+                return score, move
+            hashMove = move
+
+        alphaOrig, betaOrig = alpha, beta
+        bestScore = bestMove = None
+        for i in ordered_moves(occupied, geometry.order, hashMove):
+            bit = 1 << i
+            # a move that completes a line is scored here, without a
+            # call; a search stopped by an exception leaves self.lines
+            # behind, but every search starts from fresh counts
+            if lines.make(i, xToMove):
+                self.nodes += 1
+                self.leaves += 1
+                score = 1 if xToMove else -1
+            elif xToMove:
+                score, _ = self._alphabeta(x | bit, o, False, alpha, beta,
+                                           depth - 1)
+            else:
+                score, _ = self._alphabeta(x, o | bit, True, alpha, beta,
+                                           depth - 1)
+            lines.unmake(i, xToMove)
+            if xToMove:
+                if bestScore is None or score > bestScore:
+                    bestScore, bestMove = score, i
+                alpha = max(alpha, score)
+            else:
+                if bestScore is None or score < bestScore:
+                    bestScore, bestMove = score, i
+                beta = min(beta, score)
+            if alpha >= beta:
+                self.cutoffs += 1
+                break
+
+        if bestScore <= alphaOrig:
+            bound = UPPER
+        elif bestScore >= betaOrig:
+            bound = LOWER
+        else:
+            bound = EXACT
+        entry = (bestScore, geometry.to_canonical_move(bestMove, t), bound,
+                 depth)
+        self.table.store(key, entry)
+        return bestScore, bestMove
@@ -0,0 +1,362 @@
+"""
+Serves games against the engine over TCP, one game per connection.
+
+    python server.py [--host 127.0.0.1] [--port 8765] [--workers 4]
+
+Messages are JSON objects, one per line. The client sends
+
+    {"new": {"size": 3, "k": 3}}   start a game (size and k optional)
+    {"move": 4}                    play X on cell 4
+
+and gets the game as it stands after each one:
+
+    {"board": "X---0----", "move": 4, "state": "playing", "willwin": 0}
+
+move is the computer's reply and willwin its forecast (see
+Engine.nextMove), both left out when the computer did not move. state
+is 'playing', 'won', 'lost' or 'draw', from the client's side. A bad
+request gets {"error": "..."} and changes nothing. The client plays X
+and moves first; a connection starts with a 3x3 game.
+
+Engine calls run in a process pool, so the event loop only moves bytes
+and the searches of different games run in parallel. A Coalescer sits
+in front of the pool: games asking about the same position (up to
+symmetry) at the same time share one computation, and the other
+queries are sent to the pool in batches rather than one task each.
+"""
+
+import argparse
+import asyncio
+import concurrent.futures
+import json
+import math
+import os
+
+import bitboard
+import engine
+from bitboard import Position
+from linecounts import LineCounts
+
+# largest board a client may ask for
+MAX_SIZE = 8
+
+STATES = {2: 'playing', -1: 'won', 1: 'lost', 0: 'draw'}
+
+# per process engines, keyed by (mode, moveTime, k, solutions, cache)
+_engines = {}
+
+
+def next_move(board, player, mode, moveTime, k, solutions, cache=None):
+    """Engine.nextMove on the worker process's engine for the settings."""
+    key = (mode, moveTime, k, solutions, cache)
+    if key not in _engines:
+        _engines[key] = engine.Engine(mode, moveTime, solutions, k=k,
+                                      cache=cache)
+    return _engines[key].nextMove(board, player)
+
+
+def next_moves(queries, mode, moveTime, solutions, cache=None):
+    """next_move for a batch of (board, player, k) queries."""
+    return [next_move(board, player, mode, moveTime, k, solutions, cache)
+            for board, player, k in queries]
+
+
+def is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+class RequestError(Exception):
+    """A client request that cannot be carried out."""
+
+
+class Session(object):
+    """The game played on one connection."""
+
+    def __init__(self, size=3, k=None):
+        self.reset(size, k)
+
+    def reset(self, size=3, k=None):
+        self.size = size
+        self.k = k
+        self.board = ['-'] * (size * size)
+        self.lines = LineCounts(bitboard.geometry(size, k))
+        self.state = 2
+
+    def play(self, cell, player):
+        self.board[cell] = player
+        self.state = engine.play_move(self.lines, cell, player)
+
+    def undo(self, cell, player):
+        """Takes back player's move on cell, made while the game was on."""
+        self.board[cell] = '-'
+        self.lines.unmake(cell, player == 'X')
+        self.state = 2
+
+    def as_dict(self):
+        return {'board': ''.join(self.board), 'state': STATES[self.state]}
+
+
+class Coalescer(object):
+    """
+    Answers nextMove queries through a process pool, in batches.
+
+    Queries are keyed by the canonical form of the position, so while
+    one is being computed, every query for it or any of its symmetric
+    images waits on the same result. New queries are collected until
+    the event loop has run the other ready callbacks (or for batchDelay
+    seconds), up to batchSize of them, then split evenly into one task
+    per worker, so distinct searches still run in parallel.
+
+    The pool of worker processes belongs to the Coalescer. If a worker
+    dies, the queries sent to the pool fail and later ones go to a new
+    pool.
+
+    The counters queries, shared and batches tell how many queries were
+    asked, how many were answered by a computation already in flight
+    and how many tasks were sent to the pool.
+    """
+
+    def __init__(self, workers, mode, moveTime, solutions, batchSize=64,
+                 batchDelay=0.0, cache=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.executor = concurrent.futures.ProcessPoolExecutor(self.workers)
+        self.mode = mode
+        self.moveTime = moveTime
+        self.solutions = solutions
+        self.cache = cache
+        self.batchSize = batchSize
+        self.batchDelay = batchDelay
+        self.inflight = {}  # key -> future of (willwin, canonical move)
+        self.batch = []     # (key, board, player, k) not sent yet
+        self.flushHandle = None
+        self.queries = self.shared = self.batches = 0
+
+    async def next_move(self, board, player, k=None):
+        """Engine.nextMove(board, player) for a board with k in a row."""
+        loop = asyncio.get_running_loop()
+        position = Position.from_board(board, k)
+        geometry = position.geometry
+        cx, co, t = geometry.canonical(position.x, position.o)
+        key = (geometry.size, geometry.k, cx, co, player)
+        self.queries += 1
+
+        future = self.inflight.get(key)
+        if future is None:
+            future = self.inflight[key] = loop.create_future()
+            canonicalBoard = Position(cx, co, geometry).to_board()
+            self.batch.append((key, canonicalBoard, player, k))
+            if len(self.batch) >= self.batchSize:
+                self.flush()
+            elif self.flushHandle is None:
+                if self.batchDelay:
+                    self.flushHandle = loop.call_later(self.batchDelay,
+                                                       self.flush)
+                else:
+                    self.flushHandle = loop.call_soon(self.flush)
+        else:
+            self.shared += 1
+
+        # shielded, so a client that goes away does not cancel the
+        # result for the others waiting on it
+        willwin, move = await asyncio.shield(future)
+        return willwin, geometry.from_canonical_move(move, t)
+
+    def flush(self):
+        """Sends the collected queries to the pool."""
+        if self.flushHandle is not None:
+            self.flushHandle.cancel()
+            self.flushHandle = None
+        batch, self.batch = self.batch, []
+        if not batch:
+            return
+        chunk = math.ceil(len(batch) / self.workers)
+        for first in range(0, len(batch), chunk):
+            self.submit(batch[first:first + chunk])
+
+    def submit(self, batch):
+        """Sends one task of queries to the pool."""
+        loop = asyncio.get_running_loop()
+        executor = self.executor
+        queries = [query[1:] for query in batch]
+        self.batches += 1
+        try:
+            task = loop.run_in_executor(executor, next_moves, queries,
+                                        self.mode, self.moveTime,
+                                        self.solutions, self.cache)
+        except Exception as error:
+            # a broken or shut down pool refuses the task straight away
+            task = loop.create_future()
+            task.set_exception(error)
+        task.add_done_callback(
+            lambda done: self.finish(batch, done, executor))
+
+    def finish(self, batch, done, executor):
+        if done.cancelled():
+            error = asyncio.CancelledError()
+        else:
+            error = done.exception()
+        if (isinstance(error, concurrent.futures.BrokenExecutor) and
+                executor is self.executor):
+            # a worker died; start over with a new pool
+            executor.shutdown(wait=False)
+            self.executor = concurrent.futures.ProcessPoolExecutor(
+                self.workers)
+        for i, query in enumerate(batch):
+            future = self.inflight.pop(query[0])
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(done.result()[i])
+
+    def close(self):
+        """Shuts the pool down, cancelling the tasks not started."""
+        self.executor.shutdown(cancel_futures=True)
+
+
+class GameServer(object):
+    """
+    Hosts the games of every connection.
+
+    Arguments:
+        workers: engine processes, the number of CPUs by default
+        mode, moveTime, solutions, cache: as for engine.Engine
+        batchSize, batchDelay: as for Coalescer
+    """
+
+    def __init__(self, workers=None, mode='alphabeta', moveTime=0.05,
+                 solutions=engine.DEFAULT_PATH, batchSize=64,
+                 batchDelay=0.0, cache=None):
+        if mode not in engine.Engine.MODES:
+            raise ValueError("unknown search mode: {}".format(mode))
+        self.engine = Coalescer(workers, mode, moveTime, solutions,
+                                batchSize, batchDelay, cache)
+        self.sessions = 0
+
+    async def start(self, host='127.0.0.1', port=8765):
+        """Starts listening and returns the asyncio server."""
+        return await asyncio.start_server(self.handle, host, port)
+
+    def close(self):
+        self.engine.close()
+
+    async def handle(self, reader, writer):
+        """Plays the game of one connection until it closes."""
+        session = Session()
+        self.sessions += 1
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    break  # longer than the stream's line limit
+                if not line:
+                    break
+                try:
+                    reply = await self.respond(session, json.loads(line))
+                except (RequestError, ValueError) as error:
+                    reply = {'error': str(error)}
+                writer.write(json.dumps(reply).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.sessions -= 1
+            writer.close()
+
+    async def respond(self, session, request):
+        """Carries out one request and returns the reply."""
+        if not isinstance(request, dict):
+            raise RequestError("expected a JSON object")
+        if 'new' in request:
+            options = request['new'] or {}
+            if not isinstance(options, dict):
+                raise RequestError("'new' takes an object of options")
+            return self.new_game(session, options)
+        if 'move' in request:
+            return await self.move(session, request['move'])
+        raise RequestError("expected 'new' or 'move'")
+
+    def new_game(self, session, options):
+        size = options.get('size', 3)
+        k = options.get('k')
+        if not is_int(size) or not 1 <= size <= MAX_SIZE:
+            raise RequestError("size must be 1 to {}".format(MAX_SIZE))
+        if k is not None and (not is_int(k) or not 1 <= k <= size):
+            raise RequestError("k must be 1 to size")
+        session.reset(size, k)
+        return session.as_dict()
+
+    async def move(self, session, cell):
+        if session.state != 2:
+            raise RequestError("the game is over")
+        if (not is_int(cell) or
+                not 0 <= cell < len(session.board) or
+                session.board[cell] != '-'):
+            raise RequestError("not an empty cell: {}".format(cell))
+        session.play(cell, 'X')
+        if session.state != 2:
+            return session.as_dict()
+
+        try:
+            willwin, reply = await self.engine.next_move(session.board, '0',
+                                                         session.k)
+        except Exception as error:
+            # the engine failed (a worker died, the cache is unusable):
+            # take X's move back so the request changes nothing
+            session.undo(cell, 'X')
+            raise RequestError("the engine failed: {}".format(error))
+        session.play(reply, '0')
+        result = session.as_dict()
+        result.update(move=reply, willwin=willwin)
+        return result
+
+
+async def serve(host, port, **kwargs):
+    server = GameServer(**kwargs)
+    listener = await server.start(host, port)
+    print("Serving games on {}:{}".format(host, port))
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        server.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--host", default='127.0.0.1')
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="engine processes")
+    parser.add_argument("--mode", choices=engine.Engine.MODES,
+                        default='alphabeta')
+    parser.add_argument("--move-time", type=float, default=0.05,
+                        help="seconds per searched move")
+    parser.add_argument("--no-solutions", action="store_true",
+                        help="search every move instead of using the "
+                             "3x3 solution table")
+    parser.add_argument("--cache",
+                        help="keep solved positions in this database")
+    parser.add_argument("--batch-size", type=int, default=64,
+                        help="most engine queries collected before they are "
+                             "sent to the processes")
+    parser.add_argument("--batch-delay", type=float, default=0.0,
+                        help="milliseconds to collect queries before "
+                             "sending a batch")
+    args = parser.parse_args(argv)
+
+    solutions = None if args.no_solutions else engine.DEFAULT_PATH
+    try:
+        asyncio.run(serve(args.host, args.port, workers=args.workers,
+                          mode=args.mode, moveTime=args.move_time,
+                          solutions=solutions, batchSize=args.batch_size,
+                          batchDelay=args.batch_delay / 1000,
+                          cache=args.cache))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Precomputed solutions for every reachable 3x3 position.
+
+Only the canonical form of each position is stored (see
+bitboard.canonical), so the 8 symmetric images of a board share one
+record. The file is a 12 byte header (magic, version, record count)
+followed by the records sorted by key. A key is the base 3 encoding of
+the canonical board (cell i contributes 0, 1 or 2 times 3**i for empty,
+X and 0) as a little endian uint16. After all keys come one byte per
+record holding the game value plus one in its high nibble and the best
+move, in the canonical frame, in its low nibble. Positions where the
+game is already over are not stored.
+
+Run this module to rebuild the table:
+
+    python solutions.py [path]
+"""
+
+import mmap
+import struct
+import sys
+
+from bitboard import (FULL, canonical, from_canonical_move, has_line,
+                      to_canonical_move)
+from search import Searcher
+
+MAGIC = b'TTTS'
+VERSION = 2
+HEADER = struct.Struct('<4sBxxxI')
+KEY = struct.Struct('<H')
+DEFAULT_PATH = "solutions.bin"
+
+POWERS = tuple(3 ** i for i in range(9))
+
+
+def board_index(x, o):
+    """Returns the base 3 index of the position given by two bitboards."""
+    index = 0
+    for i in range(9):
+        if x >> i & 1:
+            index += POWERS[i]
+        elif o >> i & 1:
+            index += 2 * POWERS[i]
+    return index
+
+
+def build(path=DEFAULT_PATH):
+    """
+    Solves every reachable position and writes the table to path.
+    Returns the number of records written.
+    """
+    records = {}
+    searcher = Searcher()
+    stack = [(0, 0)]
+    seen = set()
+    while stack:
+        x, o = stack.pop()
+        cx, co, t = canonical(x, o)
+        if (cx, co) in seen:
+            continue
+        seen.add((cx, co))
+        if has_line(x) or has_line(o) or x | o == FULL:
+            continue
+
+        xToMove = bin(x).count('1') == bin(o).count('1')
+        score, move = searcher.search(x, o, xToMove)
+        records[board_index(cx, co)] = (
+            (score + 1) << 4 | to_canonical_move(move, t)
+        )
+
+        for i in range(9):
+            bit = 1 << i
+            if not (x | o) & bit:
+                stack.append((x | bit, o) if xToMove else (x, o | bit))
+
+    keys = sorted(records)
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(keys)))
+        for key in keys:
+            f.write(KEY.pack(key))
+        f.write(bytes(records[key] for key in keys))
+    return len(keys)
+
+
+class SolutionTable(object):
+    """Read-only, memory-mapped view of a table written by build()."""
+
+    def __init__(self, path=DEFAULT_PATH):
+        with open(path, 'rb') as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, self.count = HEADER.unpack_from(self.data)
+        except struct.error:
+            magic = version = None
+        if (
+                magic != MAGIC or version != VERSION or
+                len(self.data) != HEADER.size + self.count * (KEY.size + 1)
+           ):
+            self.close()
+            raise ValueError("{} is not a solution table".format(path))
+        self.values = HEADER.size + self.count * KEY.size
+
+    def _find(self, key):
+        """Binary search for key, returning its record number or -1."""
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            found, = KEY.unpack_from(self.data, HEADER.size + mid * KEY.size)
+            if found < key:
+                lo = mid + 1
+            elif found > key:
+                hi = mid
+            else:
+                return mid
+        return -1
+
+    def lookup(self, x, o, xToMove):
+        """
+        Returns (score, move) for the position, or None when it is not
+        in the table (game over, unreachable or wrong side to move).
+        """
+        if xToMove != (bin(x).count('1') == bin(o).count('1')):
+            return None
+        cx, co, t = canonical(x, o)
+        record = self._find(board_index(cx, co))
+        if record < 0:
+            return None
+        value = self.data[self.values + record]
+        return (value >> 4) - 1, from_canonical_move(value & 0x0F, t)
+
+    def close(self):
+        self.data.close()
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_PATH
+    count = build(path)
+    print("Solved {} positions into {}".format(count, path))
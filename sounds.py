@@ -0,0 +1,69 @@
+"""
+Sound effects for the game, loaded only when they are needed.
+
+Nothing is read from disk while the window is being set up: preload()
+loads the effects one per event loop pass once the window is up, and
+play() loads an effect on the spot if it has not been loaded yet. With
+sounds turned off nothing is loaded at all.
+"""
+
+from PyQt5.QtCore import *
+from PyQt5.QtMultimedia import QSoundEffect
+
+
+class SoundManager(QObject):
+
+    # in load order: the move sounds are needed first
+    FILES = (
+        ("cross", "cross.wav"),
+        ("circle", "circle.wav"),
+        ("win", "win.wav"),
+        ("lose", "lose.wav"),
+    )
+
+    def __init__(self, parent=None, enabled=True, volume=0.25):
+        super().__init__(parent)
+        self.enabled = enabled
+        self.volume = volume
+        self.effects = {}
+        self.files = dict(self.FILES)
+
+    def setEnabled(self, enabled):
+        """Turns sounds on or off; turning them on starts preloading."""
+        self.enabled = enabled
+        if enabled:
+            self.preload()
+
+    def preload(self, delay=0):
+        """
+        Loads the effects not loaded yet, one per event loop pass, after
+        delay milliseconds.
+        """
+        if not self.enabled:
+            return
+        for name, _ in self.FILES:
+            if name not in self.effects:
+                QTimer.singleShot(delay, self._preload_next)
+                return
+
+    def _preload_next(self):
+        if not self.enabled:
+            return
+        for name, _ in self.FILES:
+            if name not in self.effects:
+                self.effect(name)
+                QTimer.singleShot(0, self._preload_next)
+                return
+
+    def effect(self, name):
+        """Returns the QSoundEffect for name, loading it if needed."""
+        if name not in self.effects:
+            effect = QSoundEffect(self)
+            effect.setSource(QUrl.fromLocalFile(self.files[name]))
+            effect.setVolume(self.volume)
+            self.effects[name] = effect
+        return self.effects[name]
+
+    def play(self, name):
+        if self.enabled:
+            self.effect(name).play()
@@ -0,0 +1,268 @@
+"""
+Tablebases: the game value of every legal position of a board, found by
+retrograde analysis.
+
+Positions are grouped into layers by the number of stones on the board.
+The last layer (a full board) is valued directly; every earlier layer is
+valued from the one after it, so values flow backwards from the end of
+the game to the empty board. Positions where a line is complete are
+valued as won without looking further.
+
+Within a layer of n stones, X has (n + 1) // 2 of them, and a position
+is numbered by a perfect hash: the colex rank of the set of occupied
+cells among all n-cell subsets, times the number of ways to place the X
+stones on them, plus the colex rank of the X stones among the occupied
+cells. Every legal position of the layer gets a distinct number below
+the layer size, so values are stored at 2 bits per position with no
+keys:
+
+    0 draw, 1 X wins, 2 0 wins
+
+The file is an 8 byte header (magic, version, size, k) followed by
+cells + 1 little endian uint64 offsets of the layers, then the packed
+layers, four positions per byte, lowest bits first.
+
+Building needs NumPy and memory for the largest layer (about 2 million
+positions on 4x4); probing needs neither. 5x5 and beyond have far too
+many positions to tabulate this way. Build a tablebase with
+
+    python tablebase.py SIZE [K]
+"""
+
+import mmap
+import os
+import struct
+import sys
+
+from bitboard import geometry
+
+MAGIC = b'TTTB'
+VERSION = 1
+HEADER = struct.Struct('<4sBBBx')
+
+# stored codes of the scores 0, 1 and -1 (the score modulo 3)
+CODES = (0, 1, -1)
+
+
+def default_path(size, k=None):
+    return "tablebase-{0}x{0}-k{1}.bin".format(size, k or size)
+
+
+def binomials(n):
+    """Pascal's triangle: binomials(n)[a][b] is a choose b, for a <= n."""
+    table = [[0] * (n + 2) for _ in range(n + 1)]
+    for a in range(n + 1):
+        table[a][0] = 1
+        for b in range(1, a + 1):
+            table[a][b] = table[a - 1][b - 1] + table[a - 1][b]
+    return table
+
+
+def rank(x, o, cells, choose):
+    """
+    The number of a legal position within its layer.
+
+    Return Value:
+        (stones, number), or None if the stone counts are not legal
+    """
+    occupied = x | o
+    occupiedRank = xRank = stones = xStones = 0
+    for p in range(cells):
+        if occupied >> p & 1:
+            if x >> p & 1:
+                xStones += 1
+                xRank += choose[stones][xStones]
+            stones += 1
+            occupiedRank += choose[p][stones]
+    if xStones != (stones + 1) // 2:
+        return None
+    return stones, occupiedRank * choose[stones][xStones] + xRank
+
+
+def build(size, k=None, path=None):
+    """
+    Values every legal position of a size x size board, k in a row, and
+    writes the tablebase to path. Returns the number of positions.
+    """
+    import itertools
+
+    import numpy as np  # only the generator needs NumPy
+
+    board = geometry(size, k)
+    cells = board.cells
+    path = path or default_path(size, board.k)
+    choose = binomials(cells)
+    chooseArray = np.array(choose, dtype=np.int64)
+    lines = np.array(board.lines, dtype=np.int64)
+
+    def ranks(x, o, stones):
+        """Vectorized rank() for positions of one layer."""
+        occupied = x | o
+        occupiedRank = np.zeros(len(x), dtype=np.int64)
+        xRank = np.zeros(len(x), dtype=np.int64)
+        seen = np.zeros(len(x), dtype=np.int64)
+        xSeen = np.zeros(len(x), dtype=np.int64)
+        for p in range(cells):
+            isOccupied = occupied >> p & 1
+            isX = x >> p & 1
+            xSeen += isX
+            xRank += isX * chooseArray[seen, xSeen]
+            seen += isOccupied
+            occupiedRank += isOccupied * chooseArray[p, seen]
+        return occupiedRank * choose[stones][(stones + 1) // 2] + xRank
+
+    def positions(stones):
+        """Every legal position with the given number of stones."""
+        xStones = (stones + 1) // 2
+        occupiedCells = np.array(
+            list(itertools.combinations(range(cells), stones)),
+            dtype=np.int64).reshape(choose[cells][stones], stones)
+        xPicks = np.array(
+            list(itertools.combinations(range(stones), xStones)),
+            dtype=np.intp).reshape(choose[stones][xStones], xStones)
+        bits = np.left_shift(1, occupiedCells)
+        occupied = bits.sum(axis=1)
+        x = np.zeros((len(bits), len(xPicks)), dtype=np.int64)
+        for j in range(xStones):
+            x += bits[:, xPicks[:, j]]
+        o = occupied[:, None] - x
+        return x.ravel(), o.ravel()
+
+    def wins(mask):
+        won = np.zeros(len(mask), dtype=bool)
+        for line in lines:
+            won |= mask & line == line
+        return won
+
+    layers = [None] * (cells + 1)
+    for stones in range(cells, -1, -1):
+        x, o = positions(stones)
+        xToMove = stones % 2 == 0
+        scores = np.zeros(len(x), dtype=np.int8)
+        xWon, oWon = wins(x), wins(o)
+        scores[xWon] = 1
+        scores[oWon & ~xWon] = -1
+        playing = ~(xWon | oWon)
+
+        if stones < cells:
+            # best child score for the side to move, over empty cells
+            best = np.full(len(x), -2 if xToMove else 2, dtype=np.int8)
+            children = layers[stones + 1]
+            occupied = x | o
+            for cell in range(cells):
+                bit = 1 << cell
+                index = np.nonzero(playing & (occupied & bit == 0))[0]
+                if not len(index):
+                    continue
+                if xToMove:
+                    childRanks = ranks(x[index] | bit, o[index], stones + 1)
+                    best[index] = np.maximum(best[index],
+                                             children[childRanks])
+                else:
+                    childRanks = ranks(x[index], o[index] | bit, stones + 1)
+                    best[index] = np.minimum(best[index],
+                                             children[childRanks])
+            scores[playing] = best[playing]
+
+        layer = np.zeros(len(x), dtype=np.int8)
+        layer[ranks(x, o, stones)] = scores
+        layers[stones] = layer
+
+    offsets = []
+    packed = []
+    offset = HEADER.size + 8 * (cells + 1)
+    for layer in layers:
+        codes = (layer.astype(np.int64) % 3).astype(np.uint8)
+        codes = np.concatenate(
+            [codes, np.zeros(-len(codes) % 4, dtype=np.uint8)])
+        quads = codes.reshape(-1, 4)
+        data = (quads[:, 0] | quads[:, 1] << 2 | quads[:, 2] << 4 |
+                quads[:, 3] << 6).astype(np.uint8).tobytes()
+        offsets.append(offset)
+        packed.append(data)
+        offset += len(data)
+
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, size, board.k))
+        f.write(struct.pack('<{}Q'.format(cells + 1), *offsets))
+        for data in packed:
+            f.write(data)
+    return sum(len(layer) for layer in layers)
+
+
+class Tablebase(object):
+    """Read-only, memory-mapped view of a tablebase written by build()."""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, size, k = HEADER.unpack_from(self.data)
+            cells = size * size
+            self.offsets = struct.unpack_from(
+                '<{}Q'.format(cells + 1), self.data, HEADER.size)
+        except struct.error:
+            magic = version = None
+        if (
+                magic != MAGIC or version != VERSION or
+                len(self.data) < self.offsets[-1]
+           ):
+            self.close()
+            raise ValueError("{} is not a tablebase".format(path))
+        self.geometry = geometry(size, k)
+        self.choose = binomials(cells)
+
+    def value(self, x, o):
+        """
+        The score of a position, or None if the stone counts are not
+        those of a legal position.
+        """
+        ranked = rank(x, o, self.geometry.cells, self.choose)
+        if ranked is None:
+            return None
+        stones, number = ranked
+        byte = self.data[self.offsets[stones] + number // 4]
+        return CODES[byte >> 2 * (number % 4) & 3]
+
+    def lookup(self, x, o, xToMove):
+        """
+        Returns (score, move) for the position, or None when it is not
+        in the tablebase (game over or wrong side to move). The move
+        completes a line when it can, and otherwise keeps the best
+        score, trying cells in the geometry's order.
+        """
+        board = self.geometry
+        if xToMove != (bin(x).count('1') == bin(o).count('1')):
+            return None
+        if board.has_line(x) or board.has_line(o) or x | o == board.full:
+            return None
+        score = self.value(x, o)
+        if score is None:
+            return None
+
+        bestMove = -1
+        for cell in board.order:
+            bit = 1 << cell
+            if (x | o) & bit:
+                continue
+            if xToMove:
+                child = x | bit, o
+            else:
+                child = x, o | bit
+            if board.has_line(child[0 if xToMove else 1]):
+                return score, cell
+            if bestMove < 0 and self.value(*child) == score:
+                bestMove = cell
+        return score, bestMove
+
+    def close(self):
+        self.data.close()
+
+
+if __name__ == "__main__":
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    k = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    path = default_path(size, k)
+    count = build(size, k, path)
+    print("Valued {} positions into {} ({} bytes)".format(
+        count, path, os.path.getsize(path)))
@@ -0,0 +1,25 @@
+import os
+
+import pytest
+
+import engine
+from bitboard import STANDARD, Position, geometry
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_geometry_is_shared_whether_or_not_k_is_given():
+    assert geometry() is geometry(3) is geometry(3, 3) is STANDARD
+    assert geometry(4) is geometry(4, 4)
+    assert geometry(4, 3) is not geometry(4)
+    assert Position.from_board(list('XX-0-----')).geometry is STANDARD
+
+
+def test_standard_boards_are_answered_from_the_solution_table():
+    path = os.path.join(ROOT, engine.DEFAULT_PATH)
+    if not os.path.exists(path):
+        pytest.skip("no solution table")
+    player = engine.Engine(solutions=path, tablebases=None)
+    willwin, _ = player.nextMove(list('XX-0-----'), '0')
+    assert willwin == 1
+    assert player.lastStats.mode == 'table'
@@ -0,0 +1,68 @@
+import random
+
+import pytest
+
+from bitboard import geometry
+from linecounts import LineCounts
+from search import Searcher
+
+GEOMETRIES = [(3, 3), (4, 3), (4, 4), (5, 4), (6, 4)]
+
+
+def random_board(board, rng):
+    """Random x, o bitboards, any number of stones of either side."""
+    cells = rng.sample(range(board.cells), rng.randrange(board.cells + 1))
+    split = rng.randrange(len(cells) + 1)
+    x = sum(1 << i for i in cells[:split])
+    o = sum(1 << i for i in cells[split:])
+    return x, o
+
+
+def state(lines):
+    return lines.xCounts[:], lines.oCounts[:], lines.live, lines.score
+
+
+@pytest.mark.parametrize("size, k", GEOMETRIES)
+def test_counts_match_full_scans(size, k):
+    board = geometry(size, k)
+    searcher = Searcher(geometry=board)
+    rng = random.Random(size * 10 + k)
+    for _ in range(500):
+        x, o = random_board(board, rng)
+        lines = LineCounts(board, x, o)
+        assert lines.score / searcher.scale == searcher.evaluate(x, o)
+        assert (lines.live == 0) == board.is_dead(x, o)
+        assert lines.is_dead() == board.is_dead(x, o)
+        for i, line in enumerate(board.lines):
+            assert lines.xCounts[i] == bin(line & x).count('1')
+            assert lines.oCounts[i] == bin(line & o).count('1')
+
+
+@pytest.mark.parametrize("size, k", GEOMETRIES)
+def test_make_unmake_round_trip(size, k):
+    board = geometry(size, k)
+    rng = random.Random(size * 10 + k)
+    for _ in range(100):
+        lines = LineCounts(board)
+        x = o = 0
+        played, states = [], [state(lines)]
+        order = rng.sample(range(board.cells), board.cells)
+        for cell in order:
+            isX = rng.random() < 0.5
+            mask = x if isX else o
+            won = lines.make(cell, isX)
+            # a win is reported exactly when the stone completes a line
+            assert won == board.has_line_through(mask | 1 << cell, cell)
+            if isX:
+                x |= 1 << cell
+            else:
+                o |= 1 << cell
+            played.append((cell, isX))
+            states.append(state(lines))
+            # the incremental counts equal counts built from scratch
+            assert states[-1] == state(LineCounts(board, x, o))
+        states.pop()
+        for cell, isX in reversed(played):
+            lines.unmake(cell, isX)
+            assert state(lines) == states.pop()
+        assert state(lines) == state(LineCounts(board))
@@ -0,0 +1,105 @@
+import pytest
+
+import records
+from records import GameRecord, RecordWriter, read_games
+
+
+def write(path, games):
+    """Writes (size, k, moves, winner) games; winner None leaves one open."""
+    writer = RecordWriter(path)
+    for size, k, moves, winner in games:
+        writer.start(size, k)
+        for move in moves:
+            writer.move(move)
+        if winner is not None:
+            writer.finish(winner)
+    writer.close()
+
+
+def strip(game):
+    return game.size, game.k, game.moves, game.winner
+
+
+GAMES = [
+    (3, 3, [4, 0, 8, 2, 1, 7, 6, 3, 5], '-'),
+    (3, 3, [0, 4, 1, 3, 2], 'X'),
+    (4, 3, [5, 6, 9, 10], None),              # cut short mid-game
+    (15, 5, [112, 113, 97, 98, 82, 83, 67, 68, 52], 'X'),
+    (3, 3, [4, 0, 2, 6, 3, 5, 1, 7, 8], '-'),
+    (5, 4, [12, 0], None),                    # cut short at the end
+]
+
+
+@pytest.mark.parametrize("readSize", [1, 2, 3, 7, records.GAME.size, 64,
+                                      records.READ_SIZE])
+def test_round_trip_across_chunks(tmp_path, monkeypatch, readSize):
+    path = str(tmp_path / "games.rec")
+    write(path, GAMES)
+    monkeypatch.setattr(records, "READ_SIZE", readSize)
+    assert [strip(game) for game in read_games(path)] == [
+        (size, k, moves, winner) for size, k, moves, winner in GAMES]
+
+
+def test_appends_to_an_existing_file(tmp_path):
+    path = str(tmp_path / "games.rec")
+    write(path, GAMES[:2])
+    write(path, GAMES[2:])
+    assert len(list(read_games(path))) == len(GAMES)
+
+
+def test_game_without_moves_is_not_written(tmp_path):
+    path = str(tmp_path / "games.rec")
+    writer = RecordWriter(path)
+    writer.start()
+    writer.finish('-')
+    writer.start()
+    writer.move(4)
+    writer.finish('X')
+    writer.close()
+    games = list(read_games(path))
+    assert [game.moves for game in games] == [[4]]
+    assert isinstance(games[0], GameRecord)
+
+
+def test_truncated_game_header(tmp_path, monkeypatch):
+    path = str(tmp_path / "games.rec")
+    write(path, GAMES[:1])
+    with open(path, 'ab') as f:
+        f.write(bytes((records.START, 3)))
+    monkeypatch.setattr(records, "READ_SIZE", 5)
+    games = read_games(path)
+    assert strip(next(games)) == GAMES[0]
+    with pytest.raises(ValueError):
+        next(games)
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "other.rec"
+    path.write_bytes(b"not a record file")
+    with pytest.raises(ValueError):
+        list(read_games(str(path)))
+
+
+def test_rejects_boards_too_large_to_record(tmp_path):
+    writer = RecordWriter(str(tmp_path / "games.rec"))
+    try:
+        writer.start(15)
+        with pytest.raises(ValueError):
+            writer.start(16)
+    finally:
+        writer.close()
+
+
+def test_take_back(tmp_path):
+    path = str(tmp_path / "games.rec")
+    writer = RecordWriter(path)
+    writer.start()
+    writer.move(0)
+    writer.take_back()
+    with pytest.raises(ValueError):
+        writer.take_back()
+    writer.move(4)
+    writer.move(0)
+    writer.finish('-')
+    writer.close()
+    assert [game.moves for game in read_games(path)] == [[4, 0]]
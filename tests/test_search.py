@@ -0,0 +1,141 @@
+import functools
+import random
+
+import pytest
+
+from bitboard import STANDARD, geometry
+from search import SOLVED, Searcher
+from transposition import TranspositionTable
+
+
+@functools.lru_cache(maxsize=None)
+def minimax(x, o, xToMove):
+    """Plain minimax over every empty cell, X's point of view."""
+    if STANDARD.has_line(x):
+        return 1
+    if STANDARD.has_line(o):
+        return -1
+    occupied = x | o
+    if occupied == STANDARD.full:
+        return 0
+    scores = [
+        minimax(x | 1 << i, o, False) if xToMove else
+        minimax(x, o | 1 << i, True)
+        for i in range(STANDARD.cells) if not occupied >> i & 1
+    ]
+    return max(scores) if xToMove else min(scores)
+
+
+def positions():
+    """Every reachable 3x3 position that is not over, with X to move."""
+    found = []
+    seen = set()
+
+    def walk(x, o, xToMove):
+        if (x, o) in seen:
+            return
+        seen.add((x, o))
+        occupied = x | o
+        if (STANDARD.has_line(x) or STANDARD.has_line(o) or
+                occupied == STANDARD.full):
+            return
+        found.append((x, o, xToMove))
+        for i in range(STANDARD.cells):
+            if not occupied >> i & 1:
+                if xToMove:
+                    walk(x | 1 << i, o, False)
+                else:
+                    walk(x, o | 1 << i, True)
+    walk(0, 0, True)
+    return found
+
+
+POSITIONS = positions()
+
+
+def check(x, o, xToMove, score, move):
+    assert score == minimax(x, o, xToMove)
+    # the move is legal and keeps the score
+    assert 0 <= move < STANDARD.cells and not (x | o) >> move & 1
+    if xToMove:
+        assert minimax(x | 1 << move, o, False) == score
+    else:
+        assert minimax(x, o | 1 << move, True) == score
+
+
+def test_every_position_is_covered():
+    assert len(POSITIONS) == 4520
+
+
+@pytest.mark.parametrize("mode", Searcher.MODES)
+def test_modes_match_minimax(mode):
+    searcher = Searcher(geometry=STANDARD)
+    for x, o, xToMove in POSITIONS:
+        score, move = searcher.search(x, o, xToMove, mode)
+        check(x, o, xToMove, score, move)
+        assert searcher.depthReached == SOLVED
+
+
+def test_iterative_deepening_matches_minimax():
+    searcher = Searcher(geometry=STANDARD)
+    for x, o, xToMove in POSITIONS:
+        score, move = searcher.search(x, o, xToMove, timeLimit=60)
+        check(x, o, xToMove, score, move)
+        assert searcher.depthReached == SOLVED
+
+
+@pytest.mark.parametrize("maxsize", [1, 7])
+def test_alphabeta_with_a_tiny_table(maxsize):
+    # constant eviction: entries of other positions and bounds come and go
+    searcher = Searcher(TranspositionTable(maxsize), STANDARD)
+    for x, o, xToMove in POSITIONS:
+        score, move = searcher.search(x, o, xToMove)
+        check(x, o, xToMove, score, move)
+
+
+@pytest.mark.parametrize("alpha, beta", [(-1, 0), (0, 1), (-1, 1)])
+def test_window_scores_are_bounds(alpha, beta):
+    # one table shared by every window, so stored LOWER and UPPER bounds
+    # are reused by searches with other windows
+    searcher = Searcher(geometry=STANDARD)
+    for x, o, xToMove in POSITIONS:
+        value = minimax(x, o, xToMove)
+        score, _ = searcher.search_depth(x, o, xToMove, SOLVED, alpha, beta)
+        if value <= alpha:
+            assert score <= alpha
+        elif value >= beta:
+            assert score >= beta
+        else:
+            assert score == value
+
+
+def test_depth_limited_scores_are_heuristic():
+    searcher = Searcher(geometry=STANDARD)
+    for x, o, xToMove in POSITIONS[:500]:
+        score, _ = searcher.search_depth(x, o, xToMove, 1)
+        value = minimax(x, o, xToMove)
+        # a won or lost score is only reported when it is certain
+        if score in (-1, 1):
+            assert score == value
+        else:
+            assert -0.5 < score < 0.5
+
+
+@pytest.mark.parametrize("size, k", [(3, 3), (4, 3), (5, 4)])
+def test_canonical_form_is_shared_by_symmetric_images(size, k):
+    board = geometry(size, k)
+    rng = random.Random(size * 10 + k)
+    for _ in range(200):
+        cells = rng.sample(range(board.cells), rng.randrange(board.cells))
+        x = sum(1 << i for i in cells[::2])
+        o = sum(1 << i for i in cells[1::2])
+        cx, co, t = board.canonical(x, o)
+        assert (board.transform(x, t), board.transform(o, t)) == (cx, co)
+        for s in range(len(board.symmetries)):
+            image = board.transform(x, s), board.transform(o, s)
+            assert board.canonical(*image)[:2] == (cx, co)
+        for move in range(board.cells):
+            canonicalMove = board.to_canonical_move(move, t)
+            assert board.from_canonical_move(canonicalMove, t) == move
+            assert (board.transform(1 << move, t) ==
+                    1 << canonicalMove)
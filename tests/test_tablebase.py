@@ -0,0 +1,57 @@
+import itertools
+
+import pytest
+
+import tablebase
+from bitboard import STANDARD
+from search import Searcher
+
+
+def legal_positions(cells):
+    """Every (x, o) with X to move or one stone ahead, by brute force."""
+    for stones in range(cells + 1):
+        xStones = (stones + 1) // 2
+        for occupied in itertools.combinations(range(cells), stones):
+            for xCells in itertools.combinations(occupied, xStones):
+                x = sum(1 << i for i in xCells)
+                o = sum(1 << i for i in occupied) - x
+                yield stones, x, o
+
+
+def test_rank_numbers_each_layer_densely():
+    cells = STANDARD.cells
+    choose = tablebase.binomials(cells)
+    layers = {}
+    for stones, x, o in legal_positions(cells):
+        ranked = tablebase.rank(x, o, cells, choose)
+        assert ranked is not None
+        assert ranked[0] == stones
+        layers.setdefault(stones, []).append(ranked[1])
+
+    for stones, numbers in layers.items():
+        size = choose[cells][stones] * choose[stones][(stones + 1) // 2]
+        assert sorted(numbers) == list(range(size))
+
+
+def test_rank_rejects_illegal_stone_counts():
+    choose = tablebase.binomials(9)
+    assert tablebase.rank(0, 0b1, 9, choose) is None      # 0 first
+    assert tablebase.rank(0b11, 0, 9, choose) is None     # X twice
+
+
+def test_build_matches_search(tmp_path):
+    pytest.importorskip("numpy")
+    path = str(tmp_path / tablebase.default_path(3))
+    count = tablebase.build(3, path=path)
+    assert count == sum(1 for _ in legal_positions(9))
+
+    table = tablebase.Tablebase(path)
+    searcher = Searcher(geometry=STANDARD)
+    try:
+        for stones, x, o in legal_positions(9):
+            if STANDARD.has_line(x) or STANDARD.has_line(o):
+                continue
+            score, _ = searcher.search(x, o, stones % 2 == 0)
+            assert table.value(x, o) == score
+    finally:
+        table.close()
@@ -0,0 +1,63 @@
+"""
+Registers the Qt resources (the window and toolbar icons).
+
+Importing this module registers the compiled binary bundle
+tictactoe.rcc, which Qt memory-maps, so the icon data is never parsed
+as Python and pages are only touched when an icon is drawn. If the
+bundle is missing, it falls back to the pyrcc5 module tictactoe_rc.
+
+The ui module imports this instead of tictactoe_rc; regenerate it with
+
+    pyuic5 --resource-suffix=_resources tictactoe.ui -o tictactoe_ui.py
+
+and build the bundle with Qt's rcc,
+
+    rcc -binary Icons/tictactoe.qrc -o tictactoe.rcc
+
+or, without the Qt tools, from tictactoe_rc.py with
+
+    python tictactoe_resources.py
+"""
+
+import os
+import struct
+
+from PyQt5.QtCore import QResource
+
+RCC_PATH = "tictactoe.rcc"
+
+# header of a version 1 binary resource file: magic, version and the
+# offsets of the tree, data and name sections
+HEADER = struct.Struct('>4sIIII')
+
+
+def register(path=RCC_PATH):
+    """Registers the resources, returning True if path was used."""
+    if os.path.exists(path) and QResource.registerResource(path):
+        return True
+    import tictactoe_rc  # registers itself on import
+    return False
+
+
+def write_rcc(path=RCC_PATH):
+    """Writes the data compiled into tictactoe_rc as a binary bundle."""
+    import tictactoe_rc
+    data = tictactoe_rc.qt_resource_data
+    names = tictactoe_rc.qt_resource_name
+    tree = tictactoe_rc.qt_resource_struct
+    dataOffset = HEADER.size
+    namesOffset = dataOffset + len(data)
+    treeOffset = namesOffset + len(names)
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(b'qres', 1, treeOffset, dataOffset, namesOffset))
+        f.write(data)
+        f.write(names)
+        f.write(tree)
+
+
+register()
+
+
+if __name__ == "__main__":
+    write_rcc()
+    print("Wrote {}".format(RCC_PATH))
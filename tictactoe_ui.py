@@ -7,7 +7,7 @@
 # WARNING! All changes made in this file will be lost!
 
 from PyQt5 import QtCore, QtGui, QtWidgets
-import tictactoe_rc
+import tictactoe_resources
 
 class Ui_tictactoe(object):
     def setupUi(self, tictactoe):
@@ -27,59 +27,19 @@ class Ui_tictactoe(object):
         tictactoe.setTabShape(QtWidgets.QTabWidget.Rounded)
         self.centralwidget = QtWidgets.QWidget(tictactoe)
         self.centralwidget.setObjectName("centralwidget")
+        self.verticalLayout = QtWidgets.QVBoxLayout(self.centralwidget)
+        self.verticalLayout.setObjectName("verticalLayout")
         self.frame = QtWidgets.QFrame(self.centralwidget)
-        self.frame.setGeometry(QtCore.QRect(10, 0, 601, 411))
         self.frame.setFrameShape(QtWidgets.QFrame.NoFrame)
         self.frame.setFrameShadow(QtWidgets.QFrame.Plain)
         self.frame.setLineWidth(0)
         self.frame.setObjectName("frame")
         self.gridLayout = QtWidgets.QGridLayout(self.frame)
         self.gridLayout.setObjectName("gridLayout")
-        self.button6 = QtWidgets.QToolButton(self.frame)
-        self.button6.setText("")
-        self.button6.setIconSize(QtCore.QSize(128, 128))
-        self.button6.setObjectName("button6")
-        self.gridLayout.addWidget(self.button6, 1, 2, 1, 1)
-        self.button7 = QtWidgets.QToolButton(self.frame)
-        self.button7.setText("")
-        self.button7.setIconSize(QtCore.QSize(128, 128))
-        self.button7.setObjectName("button7")
-        self.gridLayout.addWidget(self.button7, 2, 0, 1, 1)
-        self.button1 = QtWidgets.QToolButton(self.frame)
-        self.button1.setText("")
-        self.button1.setIconSize(QtCore.QSize(128, 128))
-        self.button1.setObjectName("button1")
-        self.gridLayout.addWidget(self.button1, 0, 0, 1, 1)
-        self.button5 = QtWidgets.QToolButton(self.frame)
-        self.button5.setText("")
-        self.button5.setIconSize(QtCore.QSize(128, 128))
-        self.button5.setObjectName("button5")
-        self.gridLayout.addWidget(self.button5, 1, 1, 1, 1)
-        self.button9 = QtWidgets.QToolButton(self.frame)
-        self.button9.setText("")
-        self.button9.setIconSize(QtCore.QSize(128, 128))
-        self.button9.setObjectName("button9")
-        self.gridLayout.addWidget(self.button9, 2, 2, 1, 1)
-        self.button4 = QtWidgets.QToolButton(self.frame)
-        self.button4.setText("")
-        self.button4.setIconSize(QtCore.QSize(128, 128))
-        self.button4.setObjectName("button4")
-        self.gridLayout.addWidget(self.button4, 1, 0, 1, 1)
-        self.button3 = QtWidgets.QToolButton(self.frame)
-        self.button3.setText("")
-        self.button3.setIconSize(QtCore.QSize(128, 128))
-        self.button3.setObjectName("button3")
-        self.gridLayout.addWidget(self.button3, 0, 2, 1, 1)
-        self.button2 = QtWidgets.QToolButton(self.frame)
-        self.button2.setText("")
-        self.button2.setIconSize(QtCore.QSize(128, 128))
-        self.button2.setObjectName("button2")
-        self.gridLayout.addWidget(self.button2, 0, 1, 1, 1)
-        self.button8 = QtWidgets.QToolButton(self.frame)
-        self.button8.setText("")
-        self.button8.setIconSize(QtCore.QSize(128, 128))
-        self.button8.setObjectName("button8")
-        self.gridLayout.addWidget(self.button8, 2, 1, 1, 1)
+        self.boardWidget = BoardWidget(self.frame)
+        self.boardWidget.setObjectName("boardWidget")
+        self.gridLayout.addWidget(self.boardWidget, 0, 0, 1, 1)
+        self.verticalLayout.addWidget(self.frame)
         tictactoe.setCentralWidget(self.centralwidget)
         self.menubar = QtWidgets.QMenuBar(tictactoe)
         self.menubar.setGeometry(QtCore.QRect(0, 0, 627, 22))
@@ -131,3 +91,5 @@ class Ui_tictactoe(object):
         self.actionNew_Game.setText(_translate("tictactoe", "New Game"))
         self.action_Exit.setText(_translate("tictactoe", "Exit"))
         self.actionDark_Theme.setText(_translate("tictactoe", "Toggle Mode"))
+
+from board import BoardWidget
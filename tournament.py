@@ -0,0 +1,221 @@
+"""
+Plays many engine-vs-engine or engine-vs-random games across a process
+pool and reports aggregate statistics.
+
+    python tournament.py --games 10000 --x alphabeta --o random
+
+Players are engine search modes ('alphabeta', 'minimax', 'mcts',
+'parallel') or 'random'. Each finished game can be streamed as a JSON line with
+--log; the summary (win/draw/loss rates, games per second and per-move
+latency percentiles of the engine players) is printed at the end, as
+JSON with --json.
+"""
+
+import argparse
+import concurrent.futures
+import json
+import math
+import os
+import random
+import sys
+import time
+
+import bitboard
+import engine
+from linecounts import LineCounts
+from records import MAX_CELLS, RecordWriter
+
+PLAYERS = engine.Engine.MODES + ('random',)
+
+# games per task sent to a worker process
+CHUNK_GAMES = 50
+
+# per process engines, keyed by (mode, moveTime, k, solutions, cache)
+_engines = {}
+
+
+def _engine(mode, moveTime, k, solutions, cache):
+    key = (mode, moveTime, k, solutions, cache)
+    if key not in _engines:
+        _engines[key] = engine.Engine(mode, moveTime, solutions, k=k,
+                                      cache=cache)
+    return _engines[key]
+
+
+def play_game(players, size, k, moveTime, solutions, seed, cache=None):
+    """
+    Plays one game. players maps 'X' and '0' to a player name.
+    solutions is the 3x3 solution table path, or None to always search;
+    cache is the path of a PositionCache, or None.
+
+    Return Value:
+        dict with the winner ('X', '0' or '-' for a draw), the moves and
+        the seconds each engine move took (None for random moves)
+    """
+    rng = random.Random(seed)
+    board = ['-'] * (size * size)
+    lines = LineCounts(bitboard.geometry(size, k))
+    player = 'X'
+    moves, times = [], []
+    while True:
+        name = players[player]
+        start = time.perf_counter()
+        if name == 'random':
+            move = rng.choice([i for i, c in enumerate(board) if c == '-'])
+            times.append(None)
+        else:
+            _, move = _engine(name, moveTime, k, solutions,
+                              cache).nextMove(board, player)
+            times.append(time.perf_counter() - start)
+        board[move] = player
+        moves.append(move)
+
+        state = engine.play_move(lines, move, player)
+        if state != 2:
+            winner = '-' if state == 0 else player
+            return dict(winner=winner, moves=moves, times=times)
+        player = '0' if player == 'X' else 'X'
+
+
+def play_games(players, size, k, moveTime, solutions, seed, first, count,
+               cache=None):
+    """Plays games first .. first+count-1 and returns their results."""
+    results = []
+    for index in range(first, first + count):
+        result = play_game(players, size, k, moveTime, solutions,
+                           seed + index, cache)
+        result['game'] = index
+        results.append(result)
+    return results
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not values:
+        return None
+    rank = math.ceil(fraction * len(values)) - 1
+    return values[min(max(rank, 0), len(values) - 1)]
+
+
+def run(players, games, size=3, k=None, moveTime=0.05,
+        solutions=engine.DEFAULT_PATH, workers=None, seed=0, log=None,
+        cache=None, records=None):
+    """
+    Plays the games across a process pool, writing each result to log
+    (a text file) and records (a RecordWriter) as it arrives, and
+    returns the summary dict.
+    """
+    if games < 1:
+        raise ValueError("need at least one game")
+    wins = {'X': 0, '0': 0, '-': 0}
+    latencies = []
+    started = time.perf_counter()
+    with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+        futures = [
+            executor.submit(play_games, players, size, k, moveTime,
+                            solutions, seed, first,
+                            min(CHUNK_GAMES, games - first), cache)
+            for first in range(0, games, CHUNK_GAMES)
+        ]
+        for future in concurrent.futures.as_completed(futures):
+            for result in future.result():
+                wins[result['winner']] += 1
+                latencies.extend(t for t in result['times'] if t is not None)
+                if log is not None:
+                    log.write(json.dumps(result) + "\n")
+                if records is not None:
+                    records.start(size, k)
+                    for move in result['moves']:
+                        records.move(move)
+                    records.finish(result['winner'])
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'players': players,
+        'size': size,
+        'k': k or size,
+        'games': games,
+        'x_wins': wins['X'] / games,
+        'o_wins': wins['0'] / games,
+        'draws': wins['-'] / games,
+        'seconds': elapsed,
+        'games_per_second': games / elapsed,
+        'move_latency': {
+            'p50': percentile(latencies, 0.50),
+            'p90': percentile(latencies, 0.90),
+            'p99': percentile(latencies, 0.99),
+            'max': latencies[-1] if latencies else None,
+        },
+    }
+
+
+def positive(text):
+    """argparse type for counts of at least 1."""
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError("must be at least 1")
+    return value
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--games", type=positive, default=1000)
+    parser.add_argument("--x", choices=PLAYERS, default='alphabeta')
+    parser.add_argument("--o", choices=PLAYERS, default='random')
+    parser.add_argument("--size", type=int, default=3)
+    parser.add_argument("--k", type=int,
+                        help="stones in a row to win (default: --size)")
+    parser.add_argument("--move-time", type=float, default=0.05,
+                        help="seconds per searched move")
+    parser.add_argument("--no-solutions", action="store_true",
+                        help="search every move instead of using the "
+                             "3x3 solution table")
+    parser.add_argument("--workers", type=positive, default=os.cpu_count())
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cache",
+                        help="keep solved positions in this database")
+    parser.add_argument("--log", type=argparse.FileType('w'),
+                        help="write every game as a JSON line")
+    parser.add_argument("--records",
+                        help="append every game to this binary record "
+                             "file (see records.py)")
+    parser.add_argument("--json", action="store_true",
+                        help="print the summary as JSON")
+    args = parser.parse_args(argv)
+
+    if args.records and args.size * args.size > MAX_CELLS:
+        parser.error("--records holds boards of at most {} cells".format(
+            MAX_CELLS))
+
+    solutions = None if args.no_solutions else engine.DEFAULT_PATH
+    records = RecordWriter(args.records) if args.records else None
+    try:
+        summary = run({'X': args.x, '0': args.o}, args.games, args.size,
+                      args.k, args.move_time, solutions, args.workers,
+                      args.seed, args.log, args.cache, records)
+    finally:
+        if records is not None:
+            records.close()
+    if args.json:
+        json.dump(summary, sys.stdout, indent=2)
+        print()
+        return
+
+    latency = summary['move_latency']
+    print("{games} games of {x} (X) vs {o} (0) in {seconds:.2f}s, "
+          "{rate:.1f} games/s".format(
+              games=args.games, x=args.x, o=args.o,
+              seconds=summary['seconds'],
+              rate=summary['games_per_second']))
+    print("X wins {:.1%}  0 wins {:.1%}  draws {:.1%}".format(
+        summary['x_wins'], summary['o_wins'], summary['draws']))
+    if latency['p50'] is not None:
+        print("engine move latency  p50 {:.3f}ms  p90 {:.3f}ms  "
+              "p99 {:.3f}ms  max {:.3f}ms".format(
+                  *(latency[key] * 1000
+                    for key in ('p50', 'p90', 'p99', 'max'))))
+
+
+if __name__ == "__main__":
+    main()
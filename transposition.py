@@ -0,0 +1,47 @@
+"""
+Transposition table for the search engine.
+
+Positions are keyed by both bitboards and the side to move. The table
+keeps at most maxsize entries and evicts the least recently used one
+when it is full.
+"""
+
+from collections import OrderedDict
+
+
+class TranspositionTable(object):
+    """A bounded LRU cache of search results with hit/miss counters."""
+
+    def __init__(self, maxsize=100000):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def lookup(self, key):
+        """Returns the entry stored for key, or None."""
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry
+
+    def store(self, key, entry):
+        """Stores entry under key, evicting the oldest entry if full."""
+        if key in self.entries:
+            self.entries.move_to_end(key)
+        elif len(self.entries) >= self.maxsize:
+            self.entries.popitem(last=False)
+        self.entries[key] = entry
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
@@ -0,0 +1,45 @@
+"""Runs engine searches off the GUI thread."""
+
+from PyQt5.QtCore import *
+
+from search import SearchCancelled
+
+
+class WorkerSignals(QObject):
+    # token, willwin, move
+    finished = pyqtSignal(int, int, int)
+    # token, message
+    error = pyqtSignal(int, str)
+
+
+class SearchWorker(QRunnable):
+    """
+    Calls search(board, player, cancel) on a pool thread and emits
+    finished with the result, or error with a message if the search
+    raised. Nothing is emitted if cancel (a threading.Event) is set
+    before the search completes.
+    """
+
+    def __init__(self, token, search, board, player, cancel):
+        super().__init__()
+        self.signals = WorkerSignals()
+        self.token = token
+        self.search = search
+        self.board = board
+        self.player = player
+        self.cancel = cancel
+
+    def run(self):
+        try:
+            win, move = self.search(self.board, self.player, self.cancel)
+        except SearchCancelled:
+            return
+        except Exception as error:
+            # an exception must not end the thread silently, or the
+            # game would wait for a move forever
+            if not self.cancel.is_set():
+                self.signals.error.emit(self.token, "{}: {}".format(
+                    type(error).__name__, error))
+            return
+        if not self.cancel.is_set():
+            self.signals.finished.emit(self.token, win, move)